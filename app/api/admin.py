@@ -1,12 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
-from app.database import get_db
+from app.database import get_async_db
+from app.api.deps import require_admin_key
 from app.models.user import User as UserModel  # SQLAlchemy model
-from app.models.product import Product as ProductModel  # SQLAlchemy model
+from app.models.product import ProductStatus
 from app.schemas.user import User  # Pydantic schema for response
 from app.models.admin import AdminUser
+from app.services.view_counter import view_counter
+from app.api.categories import catalogue_cache
+from app.services.principal_cache import invalidate_principal
+from app.services.message_hub import message_hub
+from app.services.dashboard_counters import dashboard_counters
+from app.services.image_derivatives import derivative_cache
+from app.services.product_service import listing_cache
+from app.services.product_cache import product_cache
+from app.services.password_hasher import password_hasher
+from app.services.product_import import product_importer
+from app.services.gst_verifier import gst_verifier
+from app.config import settings
 
 router = APIRouter()
 
@@ -14,32 +29,114 @@ router = APIRouter()
 # In production, add proper admin authentication
 
 @router.get("/dashboard")
-async def admin_dashboard(db: Session = Depends(get_db)):
-    total_users = db.query(UserModel).count()
-    verified_users = db.query(UserModel).filter(UserModel.is_verified == True).count()
-    total_products = db.query(ProductModel).count()
-    active_products = db.query(ProductModel).filter(ProductModel.is_active == True).count()
+async def admin_dashboard(db: AsyncSession = Depends(get_async_db)):
+    counters = await dashboard_counters.read(db)
     
     return {
-        "total_users": total_users,
-        "verified_users": verified_users,
-        "total_products": total_products,
-        "active_products": active_products,
-        "verification_pending": total_users - verified_users
+        "total_users": counters["total_users"],
+        "verified_users": counters["verified_users"],
+        "active_users": counters["active_users"],
+        "total_products": counters["total_products"],
+        "active_products": counters["active_products"],
+        "products_by_status": {
+            product_status.value: counters[f"products_status_{product_status.value}"]
+            for product_status in ProductStatus
+        },
+        "verification_pending": counters["total_users"] - counters["verified_users"]
     }
 
+@router.get("/counters")
+async def counter_stats():
+    return dashboard_counters.stats()
+
+@router.post("/counters/reconcile", dependencies=[Depends(require_admin_key)])
+async def reconcile_counters():
+    if not await dashboard_counters.reconcile():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Reconciliation already in progress"
+        )
+    return dashboard_counters.stats()
+
+@router.get("/view-counter")
+async def view_counter_stats():
+    return view_counter.stats()
+
+@router.get("/image-cache")
+async def image_cache_stats():
+    return derivative_cache.stats()
+
+@router.get("/listing-cache", dependencies=[Depends(require_admin_key)])
+async def listing_cache_stats():
+    return listing_cache.stats()
+
+@router.post("/listing-cache/invalidate", dependencies=[Depends(require_admin_key)])
+async def invalidate_listing_cache():
+    listing_cache.invalidate()
+    return {"message": "Listing cache invalidated"}
+
+@router.get("/product-cache", dependencies=[Depends(require_admin_key)])
+async def product_cache_stats():
+    return product_cache.stats()
+
+@router.get("/password-hasher", dependencies=[Depends(require_admin_key)])
+async def password_hasher_stats():
+    return password_hasher.stats()
+
+@router.get("/product-importer", dependencies=[Depends(require_admin_key)])
+async def product_importer_stats():
+    return product_importer.stats()
+
+@router.get("/gst-verifier", dependencies=[Depends(require_admin_key)])
+async def gst_verifier_stats():
+    return gst_verifier.stats()
+
+@router.get("/realtime", dependencies=[Depends(require_admin_key)])
+async def realtime_stats():
+    return message_hub.stats()
+
+@router.get("/catalogue", dependencies=[Depends(require_admin_key)])
+async def catalogue_cache_stats():
+    return catalogue_cache.stats()
+
+@router.post("/catalogue/invalidate", dependencies=[Depends(require_admin_key)])
+async def invalidate_catalogue():
+    catalogue_cache.invalidate()
+    return {"message": "Catalogue cache invalidated"}
+
 @router.get("/users", response_model=List[User])
 async def list_users_admin(
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    users = db.query(UserModel).offset(skip).limit(limit).all()
-    return users
+    result = await db.execute(select(UserModel).offset(skip).limit(limit))
+    return result.scalars().all()
+
+@router.post(
+    "/users/verify-gst",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(require_admin_key)]
+)
+async def verify_pending_users(limit: int = Query(settings.gst_batch_size, ge=1, le=1000)):
+    """Start checking unverified users' GSTINs against the registry, rate
+    limited. Returns the batch to poll at GET /users/verify-gst/{id}."""
+    return asdict(gst_verifier.start_batch(limit))
+
+@router.get("/users/verify-gst/{batch_id}", dependencies=[Depends(require_admin_key)])
+async def get_verification_batch(batch_id: UUID):
+    # Batches are tracked by the worker that started them
+    batch = gst_verifier.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Verification batch not found"
+        )
+    return asdict(batch)
 
 @router.put("/users/{user_id}/verify")
-async def verify_user(user_id: UUID, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+async def verify_user(user_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    user = await db.get(UserModel, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -47,12 +144,13 @@ async def verify_user(user_id: UUID, db: Session = Depends(get_db)):
         )
     
     user.is_verified = True
-    db.commit()
+    await db.commit()
+    invalidate_principal(user.id)
     return {"message": "User verified successfully"}
 
 @router.put("/users/{user_id}/deactivate")
-async def deactivate_user(user_id: UUID, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+async def deactivate_user(user_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    user = await db.get(UserModel, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -60,5 +158,6 @@ async def deactivate_user(user_id: UUID, db: Session = Depends(get_db)):
         )
     
     user.is_active = False
-    db.commit()
+    await db.commit()
+    invalidate_principal(user.id)
     return {"message": "User deactivated successfully"}
\ No newline at end of file
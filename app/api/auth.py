@@ -1,42 +1,57 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_async_db
 from app.schemas.auth import LoginRequest, Token, RefreshTokenRequest
 from app.schemas.user import UserCreate, User
-from app.services.auth_service import AuthService
+from app.services.auth_service import AsyncAuthService
+from app.services.gst_verifier import RegistryUnavailable, gst_verifier
+from app.services.password_hasher import HasherSaturated
 from app.utils.security import create_access_token, create_refresh_token, verify_token
-from app.utils.validators import verify_gst_number
 
 router = APIRouter()
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many login attempts in progress, try again shortly",
+        headers={"Retry-After": "1"}
+    )
+
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-async def register(user_create: UserCreate, db: Session = Depends(get_db)):
+async def register(user_create: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user already exists
-    if AuthService.get_user_by_email(db, user_create.email):
+    if await AsyncAuthService.get_user_by_email(db, user_create.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    if AuthService.get_user_by_gst(db, user_create.gst_number):
+    if await AsyncAuthService.get_user_by_gst(db, user_create.gst_number):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="GST number already registered"
         )
     
-    if AuthService.get_user_by_phone(db, user_create.phone):
+    if await AsyncAuthService.get_user_by_phone(db, user_create.phone):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Phone number already registered"
         )
     
     # Create user
-    user = AuthService.create_user(db, user_create)
+    try:
+        user = await AsyncAuthService.create_user(db, user_create)
+    except HasherSaturated:
+        raise _hasher_busy()
     return user
 
 @router.post("/login", response_model=Token)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    user = AuthService.authenticate_user(db, login_data.email, login_data.password)
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    try:
+        user = await AsyncAuthService.authenticate_user(db, login_data.email, login_data.password)
+    except HasherSaturated:
+        raise _hasher_busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -80,5 +95,11 @@ async def refresh_token(refresh_data: RefreshTokenRequest, db: Session = Depends
 
 @router.get("/verify-gst/{gst_number}")
 async def verify_gst_endpoint(gst_number: str):
-    result = await verify_gst_number(gst_number)
-    return result
\ No newline at end of file
+    try:
+        return await gst_verifier.verify(gst_number)
+    except RegistryUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="GST registry unavailable, try again later",
+            headers={"Retry-After": "60"}
+        )
\ No newline at end of file
@@ -1,18 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+import hashlib
+from fastapi import APIRouter, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from typing import Callable, Dict, List, Tuple
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.utils.cache import ResponseCache
 from app.schemas.category import Category, Material
 from app.models.category import Category as CategoryModel, Material as MaterialModel
 
 router = APIRouter()
 
+class CatalogueCache:
+    """Pre-serialized category/material lists with strong ETags.
+
+    The catalogue changes rarely but is requested by every browse page, so
+    entries hold the final JSON bytes and their ETag, in a ResponseCache
+    (coalesced reloads; invalidate() discards reloads already in flight).
+    A matching If-None-Match is answered with 304 without touching the DB
+    or pydantic.
+    """
+
+    def __init__(self, ttl: int, max_bytes: int = 16777216):
+        self._cache = ResponseCache(max_bytes, ttl)
+        self._loaders: Dict[str, Callable] = {}
+
+    def register(self, key: str, loader: Callable):
+        self._loaders[key] = loader
+
+    async def get(self, key: str) -> Tuple[bytes, str]:
+        async def load() -> Tuple[bytes, dict]:
+            body = await self._loaders[key]()
+            return body, {"ETag": '"%s"' % hashlib.sha256(body).hexdigest()[:32]}
+        body, headers = await self._cache.get_or_compute(key, load)
+        return body, headers["ETag"]
+
+    def invalidate(self):
+        self._cache.invalidate()
+
+    async def warm(self):
+        for key in self._loaders:
+            await self.get(key)
+
+    async def response(self, key: str, request: Request) -> Response:
+        body, etag = await self.get(key)
+        headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+catalogue_cache = CatalogueCache(settings.catalogue_cache_ttl_seconds)
+
+category_list = TypeAdapter(List[Category])
+material_list = TypeAdapter(List[Material])
+
+async def _load_categories() -> bytes:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(CategoryModel).where(CategoryModel.is_active == True))
+        return category_list.dump_json(category_list.validate_python(result.scalars().all()))
+
+async def _load_materials() -> bytes:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(MaterialModel).where(MaterialModel.is_active == True))
+        return material_list.dump_json(material_list.validate_python(result.scalars().all()))
+
+catalogue_cache.register("categories", _load_categories)
+catalogue_cache.register("materials", _load_materials)
+
 @router.get("/", response_model=List[Category])
-async def list_categories(db: Session = Depends(get_db)):
-    categories = db.query(CategoryModel).filter(CategoryModel.is_active == True).all()
-    return categories
+async def list_categories(request: Request):
+    return await catalogue_cache.response("categories", request)
 
 @router.get("/materials", response_model=List[Material])
-async def list_materials(db: Session = Depends(get_db)):
-    materials = db.query(MaterialModel).filter(MaterialModel.is_active == True).all()
-    return materials
\ No newline at end of file
+async def list_materials(request: Request):
+    return await catalogue_cache.response("materials", request)
@@ -1,22 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import asyncio
+import time
+from fastapi import APIRouter, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
 from uuid import UUID
-from app.database import get_db
-from app.api.deps import get_current_active_user
-from app.schemas.conversation import Conversation, ConversationCreate, Message, MessageCreate
-from app.services.conversation_service import ConversationService
-from app.models.user import User
+from app.database import AsyncSessionLocal, get_async_db
+from app.api.deps import authenticate_token, get_current_active_user
+from app.schemas.conversation import Conversation, ConversationCreate, ConversationSummary, Message, MessageCreate
+from app.services.conversation_service import AsyncConversationService, ConversationService
+from app.services.message_hub import message_hub
+from app.services.principal_cache import Principal
+from app.utils.security import decode_token
 
 router = APIRouter()
 
+# Application close code (4000-4999) for a connection whose access token
+# expired; clients reconnect with a refreshed token
+WS_TOKEN_EXPIRED = 4401
+
 @router.post("/", response_model=Conversation, status_code=status.HTTP_201_CREATED)
 async def create_conversation(
     conversation_create: ConversationCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    conversation = ConversationService.create_conversation(db, conversation_create, current_user.id)
+    conversation = await AsyncConversationService.create_conversation(db, conversation_create, current_user.id)
     if not conversation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -26,40 +34,164 @@ async def create_conversation(
 
 @router.get("/", response_model=List[Conversation])
 async def list_conversations(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    conversations = await AsyncConversationService.get_user_conversations(db, current_user.id)
+    return conversations
+
+@router.get("/inbox", response_model=List[ConversationSummary])
+async def list_inbox(
+    response: Response,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    conversations = ConversationService.get_user_conversations(db, current_user.id)
+    try:
+        conversations = await AsyncConversationService.get_inbox(db, current_user.id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    next_cursor = ConversationService.next_inbox_cursor(conversations, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return conversations
 
 @router.get("/{conversation_id}", response_model=Conversation)
 async def get_conversation(
     conversation_id: UUID,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    limit: int = 50,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    conversation = ConversationService.get_conversation(db, conversation_id, current_user.id)
+    try:
+        conversation = await AsyncConversationService.get_conversation(
+            db, conversation_id, current_user.id, limit, before, after
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not conversation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
     
+    # Cursors for scrolling back to older messages and polling for newer ones
+    messages = conversation.messages
+    if messages:
+        if len(messages) == limit and not after:
+            response.headers["X-Before-Cursor"] = ConversationService.message_cursor(messages[0])
+        response.headers["X-After-Cursor"] = ConversationService.message_cursor(messages[-1])
+    elif after:
+        response.headers["X-After-Cursor"] = after
+    
     # Mark messages as read
-    ConversationService.mark_messages_as_read(db, conversation_id, current_user.id)
+    marked = await AsyncConversationService.mark_messages_as_read(db, conversation_id, current_user.id)
+    if marked:
+        counterpart = conversation.seller_id if current_user.id == conversation.buyer_id else conversation.buyer_id
+        await _publish_read(conversation_id, current_user.id, counterpart)
     return conversation
 
 @router.post("/{conversation_id}/messages", response_model=Message, status_code=status.HTTP_201_CREATED)
 async def send_message(
     conversation_id: UUID,
     message_create: MessageCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    message = ConversationService.send_message(db, conversation_id, current_user.id, message_create)
+    message = await AsyncConversationService.send_message(db, conversation_id, current_user.id, message_create)
     if not message:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found or not authorized"
         )
-    return message
\ No newline at end of file
+    
+    conversation = message.conversation
+    await message_hub.publish([conversation.buyer_id, conversation.seller_id], {
+        "type": "message",
+        "conversation_id": str(conversation_id),
+        "message": Message.model_validate(message).model_dump(mode="json")
+    })
+    return message
+
+async def _publish_read(conversation_id: UUID, reader_id: UUID, counterpart_id: UUID):
+    await message_hub.publish([counterpart_id], {
+        "type": "read",
+        "conversation_id": str(conversation_id),
+        "reader_id": str(reader_id)
+    })
+
+@router.websocket("/ws")
+async def conversation_events(websocket: WebSocket, token: str):
+    """Push channel for new messages, read receipts and typing indicators.
+
+    Browsers can't set headers on a WebSocket, so the access token is passed
+    as a query parameter. Clients may send {"type": "typing" | "read",
+    "conversation_id": ...}. The connection is closed with WS_TOKEN_EXPIRED
+    once the token expires, and with 1008 if the user is found deactivated
+    when a frame arrives.
+    """
+    principal = await authenticate_token(token)
+    payload = decode_token(token)
+    if principal is None or not principal.is_active or payload is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    expires_at = payload["exp"]
+    
+    await websocket.accept()
+    subscriber = message_hub.subscribe(websocket, principal.id)
+    # conversation id -> other participant, looked up once per connection
+    counterparts: Dict[UUID, Optional[UUID]] = {}
+    close_code = 1000
+    try:
+        while True:
+            try:
+                data = await asyncio.wait_for(websocket.receive_json(), expires_at - time.time())
+            except asyncio.TimeoutError:
+                close_code = WS_TOKEN_EXPIRED
+                break
+            # Cached; a deactivation invalidates the cached principal
+            principal = await authenticate_token(token)
+            if principal is None or not principal.is_active:
+                close_code = status.WS_1008_POLICY_VIOLATION
+                break
+            
+            try:
+                event_type = data["type"]
+                conversation_id = UUID(str(data["conversation_id"]))
+            except (TypeError, KeyError, ValueError):
+                subscriber.put('{"type": "error", "detail": "Invalid event"}')
+                continue
+            
+            if conversation_id not in counterparts:
+                async with AsyncSessionLocal() as db:
+                    counterparts[conversation_id] = await AsyncConversationService.get_counterpart(
+                        db, conversation_id, principal.id
+                    )
+            counterpart = counterparts[conversation_id]
+            if counterpart is None:
+                subscriber.put('{"type": "error", "detail": "Conversation not found"}')
+                continue
+            
+            if event_type == "typing":
+                await message_hub.publish([counterpart], {
+                    "type": "typing",
+                    "conversation_id": str(conversation_id),
+                    "user_id": str(principal.id)
+                })
+            elif event_type == "read":
+                async with AsyncSessionLocal() as db:
+                    marked = await AsyncConversationService.mark_messages_as_read(db, conversation_id, principal.id)
+                if marked:
+                    await _publish_read(conversation_id, principal.id, counterpart)
+            else:
+                subscriber.put('{"type": "error", "detail": "Unknown event type"}')
+    except (WebSocketDisconnect, ValueError):
+        # ValueError: the client sent a frame that isn't JSON
+        pass
+    finally:
+        await message_hub.unsubscribe(subscriber, close_code)
\ No newline at end of file
@@ -1,36 +1,66 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+import time
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.user import User
-from app.utils.security import verify_token
+from uuid import UUID
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.auth_service import AsyncAuthService
+from app.services.principal_cache import Principal, principal_cache, token_cache
+from app.utils.security import decode_token
 from typing import Optional
 
 security = HTTPBearer()
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(security)) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    user_id = verify_token(token.credentials)
+async def authenticate_token(token: str) -> Optional[Principal]:
+    """Resolve an access token to its principal, or None if it is invalid"""
+    # Decoded claims are cached until the token expires
+    user_id = token_cache.get(token)
     if user_id is None:
-        raise credentials_exception
+        payload = decode_token(token)
+        if payload is None:
+            return None
+        try:
+            user_id = UUID(payload["sub"])
+        except ValueError:
+            return None
+        token_cache.set(token, user_id, ttl=payload["exp"] - time.time())
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        async with AsyncSessionLocal() as db:
+            user = await AsyncAuthService.get_user_by_id(db, user_id)
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        principal_cache.set(user_id, principal)
     
-    return user
+    return principal
+
+async def get_current_user(token: str = Depends(security)) -> Principal:
+    principal = await authenticate_token(token.credentials)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_current_verified_user(current_user: User = Depends(get_current_active_user)) -> User:
+def get_current_verified_user(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     if not current_user.is_verified:
         raise HTTPException(status_code=400, detail="User not verified")
-    return current_user
\ No newline at end of file
+    return current_user
+
+def require_admin_key(x_admin_key: Optional[str] = Header(None)):
+    """Guards admin operations that are expensive to run; disabled unless
+    admin_api_key is configured"""
+    if not settings.admin_api_key:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin operations are disabled")
+    if x_admin_key is None or not hmac.compare_digest(x_admin_key, settings.admin_api_key):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin key")
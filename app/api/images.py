@@ -0,0 +1,61 @@
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from typing import Optional
+from uuid import UUID
+from app.config import settings
+from app.services.image_derivatives import DerivativeSpec, UnrenderableImage, derivative_cache
+from app.utils.image_processing import DERIVATIVE_FITS, DERIVATIVE_FORMATS
+from app.utils.media import IMMUTABLE_CACHE_CONTROL, MediaFileResponse
+
+router = APIRouter()
+
+@router.get("/{image_id}")
+async def get_image_derivative(
+    request: Request,
+    image_id: UUID,
+    w: Optional[int] = None,
+    h: Optional[int] = None,
+    fit: str = "contain",
+    image_format: str = Query("webp", alias="format")
+):
+    """A product image resized to fit w x h (contain) or cropped to fill it
+    (cover), rendered on first request and served from the disk cache after.
+    w and h must be among settings.derivative_sizes."""
+    if not w and not h:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="w or h is required")
+    sizes = settings.derivative_sizes
+    if any(side is not None and side not in sizes for side in (w, h)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"w and h must be one of: {', '.join(map(str, sizes))}"
+        )
+    if fit not in DERIVATIVE_FITS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"fit must be one of: {', '.join(DERIVATIVE_FITS)}"
+        )
+    if image_format not in DERIVATIVE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(DERIVATIVE_FORMATS)}"
+        )
+    
+    try:
+        path = await derivative_cache.get(DerivativeSpec(image_id, w, h, fit, image_format))
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    except UnrenderableImage:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Image could not be decoded"
+        )
+    
+    # A derivative's URL fully determines its bytes, since originals never change
+    return MediaFileResponse(
+        path,
+        media_type=f"image/{image_format}",
+        cache_control=IMMUTABLE_CACHE_CONTROL,
+        method=request.method
+    )
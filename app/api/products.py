@@ -1,49 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from uuid import UUID
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
+from typing import Dict, List, Optional, Tuple
+import json
+from uuid import UUID, uuid4
+from app.database import AsyncSessionLocal, get_async_db
 from app.api.deps import get_current_active_user, get_current_verified_user
-from app.schemas.product import Product, ProductCreate, ProductUpdate, ProductListItem
-from app.models.product import Product as ProductModel  # SQLAlchemy model
-from app.services.product_service import ProductService
-from app.utils.image_processing import process_product_image
+from app.schemas.product import (
+    Product, ProductCreate, ProductUpdate, ProductListItem, ProductSuggestions,
+    ProductImage, ProductImageUpload, ProductImportJob
+)
+from app.services.product_service import (
+    AsyncProductService, MatchMode, ProductService, listing_cache, normalize_text, parse_facets
+)
+from app.services.view_counter import view_counter
+from app.services.image_pipeline import image_pipeline
+from app.services.product_import import IMPORT_FORMATS, ImportQueueFull, ImportTooLarge, product_importer
+from app.services.product_export import EXPORT_MEDIA_TYPES, ExportResponse, export_slots, stream_products
+from app.utils.pagination import InvalidCursor
+from app.utils.image_processing import save_original_image
 from app.config import settings
-from app.models.user import User
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
 @router.post("/", response_model=Product, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_create: ProductCreate,
-    current_user: User = Depends(get_current_verified_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_verified_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    product = ProductService.create_product(db, product_create, current_user.id)
+    product = await AsyncProductService.create_product(db, product_create, current_user.id)
     return product
 
-@router.get("/", response_model=List[ProductListItem])
-async def list_products(
-    query: Optional[str] = None,
-    category_id: Optional[UUID] = None,
-    material_id: Optional[UUID] = None,
-    city: Optional[str] = None,
-    state: Optional[str] = None,
-    min_price: Optional[float] = None,
-    max_price: Optional[float] = None,
-    condition: Optional[str] = None,
-    sort_by: str = "created_at",
-    sort_order: str = "desc",
-    skip: int = 0,
-    limit: int = 20,
-    db: Session = Depends(get_db)
-):
-    products = ProductService.search_products(
-        db, query, category_id, material_id, city, state,
-        min_price, max_price, condition, sort_by, sort_order, skip, limit
-    )
-    
-    # Convert to list items with primary image
+product_list = TypeAdapter(List[ProductListItem])
+
+def _list_items(products) -> List[ProductListItem]:
+    """Convert to list items with primary image"""
     result = []
     for product in products:
         primary_image = next((img for img in product.images if img.is_primary), None)
@@ -61,33 +55,220 @@ async def list_products(
             views_count=product.views_count,
             status=product.status,
             created_at=product.created_at,
-            primary_image=primary_image.image_path if primary_image else None
+            primary_image=primary_image.image_path if primary_image else None,
+            snippet=product.search_snippet
         )
         result.append(item)
-    
     return result
 
+@router.get("/", response_model=List[ProductListItem])
+async def list_products(
+    query: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+    material_id: Optional[UUID] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    condition: Optional[str] = None,
+    sort_by: str = "created_at",
+    sort_order: str = "desc",
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    match: MatchMode = "contains"
+):
+    """Served from listing_cache: the key is the normalized parameters, so
+    requests differing only in case or spacing share an entry. Facet counts
+    for the same filters are at GET /products/facets."""
+    query, city, state = normalize_text(query), normalize_text(city), normalize_text(state)
+    
+    async def render() -> Tuple[bytes, dict]:
+        headers = {}
+        # Own session: the render is shared by every request waiting on this key
+        async with AsyncSessionLocal() as db:
+            products = await AsyncProductService.search_products(
+                db, query, category_id, material_id, city, state,
+                min_price, max_price, condition, sort_by, sort_order, skip, limit, cursor, match
+            )
+            
+            next_cursor = ProductService.next_cursor(products, limit, sort_by, sort_order, query)
+            if next_cursor:
+                headers["X-Next-Cursor"] = next_cursor
+            
+            # Offer "did you mean" terms when a first page comes back empty
+            if not products and not cursor and not skip and (query or city or state):
+                suggestions = await AsyncProductService.suggest_terms(db, query, city, state)
+                if any(suggestions.values()):
+                    headers["X-Did-You-Mean"] = json.dumps(suggestions)
+        
+        return product_list.dump_json(_list_items(products)), headers
+    
+    key = (
+        query, category_id, material_id, city, state, min_price, max_price, condition,
+        sort_by, sort_order, skip, limit, cursor, match
+    )
+    try:
+        body, headers = await listing_cache.get_or_compute(key, render)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.post("/import", response_model=ProductImportJob, status_code=status.HTTP_202_ACCEPTED)
+async def import_products(
+    request: Request,
+    current_user: Principal = Depends(get_current_verified_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Bulk-create products from a CSV or JSON Lines body (one ProductCreate
+    per row). Returns a job to poll at GET /products/import/{job_id}."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    import_format = IMPORT_FORMATS.get(content_type)
+    if not import_format:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type must be one of: {', '.join(IMPORT_FORMATS)}"
+        )
+    
+    try:
+        product_importer.reserve()
+    except ImportQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many imports in progress, try again later",
+            headers={"Retry-After": "60"}
+        )
+    
+    job_id = uuid4()
+    try:
+        await product_importer.spool(
+            request.stream(), product_importer.spool_path(job_id, import_format), settings.max_import_size
+        )
+        job = await AsyncProductService.create_import_job(db, job_id, current_user.id, import_format)
+    except ImportTooLarge:
+        product_importer.release()
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Import file too large"
+        )
+    except BaseException:
+        product_importer.release()
+        raise
+    product_importer.submit(job)
+    return job
+
+@router.get("/import/{job_id}", response_model=ProductImportJob)
+async def get_import_job(
+    job_id: UUID,
+    current_user: Principal = Depends(get_current_verified_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    job = await AsyncProductService.get_import_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    return job
+
+@router.get("/export")
+async def export_products(
+    export_format: str = Query("ndjson", alias="format"),
+    query: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+    material_id: Optional[UUID] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    condition: Optional[str] = None,
+    match: MatchMode = "contains",
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Every active product matching the listing filters, streamed as
+    NDJSON or CSV"""
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+    slot = export_slots.try_acquire()
+    if slot is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many exports in progress, try again shortly",
+            headers={"Retry-After": "30"}
+        )
+    
+    rows = stream_products(
+        slot, export_format, query, category_id, material_id, city, state,
+        min_price, max_price, condition, match
+    )
+    return ExportResponse(
+        rows,
+        slot,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="products.{export_format}"'}
+    )
+
+@router.get("/suggestions", response_model=ProductSuggestions)
+async def suggest_products(
+    query: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    limit: int = 5,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await AsyncProductService.suggest_terms(db, query, city, state, limit)
+
+@router.get("/facets", response_model=Dict[str, Dict[str, int]])
+async def get_product_facets(
+    facets: str,
+    query: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+    material_id: Optional[UUID] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    condition: Optional[str] = None,
+    match: MatchMode = "contains",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Counts per value of each named facet (comma-separated) over every
+    product matching the GET /products/ filters, not just one page"""
+    try:
+        facet_names = parse_facets(facets)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await AsyncProductService.facet_counts(
+        db, facet_names, query=query, category_id=category_id, material_id=material_id,
+        city=city, state=state, min_price=min_price, max_price=max_price,
+        condition=condition, match=match
+    )
+
 @router.get("/{product_id}", response_model=Product)
-async def get_product(product_id: UUID, db: Session = Depends(get_db)):
-    product = ProductService.get_product(db, product_id)
-    if not product:
+async def get_product(product_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    # Pre-serialized; views_count is as of when the body was cached
+    body = await AsyncProductService.get_product_detail(db, product_id)
+    if body is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    # Increment views
-    ProductService.increment_views(db, product_id)
-    return product
+    # Buffered, written back in batches by the view counter, cached or not
+    view_counter.record(product_id)
+    return Response(content=body, media_type="application/json")
 
 @router.put("/{product_id}", response_model=Product)
 async def update_product(
     product_id: UUID,
     product_update: ProductUpdate,
-    current_user: User = Depends(get_current_verified_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_verified_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    product = ProductService.update_product(db, product_id, product_update, current_user.id)
+    product = await AsyncProductService.update_product(db, product_id, product_update, current_user.id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,29 +279,26 @@ async def update_product(
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
     product_id: UUID,
-    current_user: User = Depends(get_current_verified_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_verified_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    success = ProductService.delete_product(db, product_id, current_user.id)
+    success = await AsyncProductService.delete_product(db, product_id, current_user.id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found or not authorized"
         )
 
-@router.post("/{product_id}/images")
+@router.post("/{product_id}/images", response_model=ProductImageUpload)
 async def upload_product_images(
     product_id: UUID,
     files: List[UploadFile] = File(...),
     is_primary: Optional[bool] = Form(False),
-    current_user: User = Depends(get_current_verified_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_verified_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Verify product ownership
-    product = db.query(ProductModel).filter(
-        ProductModel.id == product_id,
-        ProductModel.seller_id == current_user.id
-    ).first()
+    product = await AsyncProductService.get_owned_product(db, product_id, current_user.id)
     
     if not product:
         raise HTTPException(
@@ -134,48 +312,49 @@ async def upload_product_images(
         if file.content_type not in ["image/jpeg", "image/png", "image/webp"]:
             continue
         
-        # Process image
-        image_data = process_product_image(file, str(product_id), settings.upload_directory)
+        # Hash while storing; variants of new content are rendered by the image pipeline
+        image_data = await run_in_threadpool(save_original_image, file, settings.upload_directory)
         image_data["is_primary"] = is_primary and i == 0  # Only first image can be primary
         image_data["mime_type"] = file.content_type
         
-        # Save to database
-        db_image = ProductService.add_product_image(db, product_id, image_data)
+        # Save to database, reusing the blob if these bytes are already stored
+        db_image, needs_render = await AsyncProductService.add_product_image(db, product_id, image_data)
+        if needs_render:
+            image_pipeline.submit(db_image)
         uploaded_images.append(db_image)
     
     return {"uploaded_count": len(uploaded_images), "images": uploaded_images}
 
+@router.get("/{product_id}/images/{image_id}", response_model=ProductImage)
+async def get_product_image_status(
+    product_id: UUID,
+    image_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    image = await AsyncProductService.get_product_image(db, product_id, image_id)
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    return image
+
 @router.get("/my-products/", response_model=List[ProductListItem])
 async def get_my_products(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    products = db.query(ProductModel).filter(
-        ProductModel.seller_id == current_user.id
-    ).offset(skip).limit(limit).all()
+    try:
+        products = await AsyncProductService.get_seller_products(db, current_user.id, skip, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    # Convert to list items
-    result = []
-    for product in products:
-        primary_image = next((img for img in product.images if img.is_primary), None)
-        if not primary_image and product.images:
-            primary_image = product.images[0]
-        
-        item = ProductListItem(
-            id=product.id,
-            title=product.title,
-            price=product.price,
-            price_negotiable=product.price_negotiable,
-            condition=product.condition,
-            location_city=product.location_city,
-            location_state=product.location_state,
-            views_count=product.views_count,
-            status=product.status,
-            created_at=product.created_at,
-            primary_image=primary_image.image_path if primary_image else None
-        )
-        result.append(item)
+    next_cursor = ProductService.next_cursor(products, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    return result
\ No newline at end of file
+    return _list_items(products)
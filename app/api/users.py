@@ -1,33 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.api.deps import get_current_active_user
+from app.services.auth_service import AsyncAuthService
+from app.services.principal_cache import Principal
 from app.schemas.user import User, UserUpdate
 from app.models.user import User as UserModel
 
 router = APIRouter()
 
 @router.get("/me", response_model=User)
-async def get_current_user_profile(current_user: UserModel = Depends(get_current_active_user)):
+async def get_current_user_profile(current_user: Principal = Depends(get_current_active_user)):
     return current_user
 
 @router.put("/me", response_model=User)
 async def update_current_user(
     user_update: UserUpdate,
-    current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    update_data = user_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(current_user, field, value)
-    
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    # The principal is a cached snapshot, so load the row to update it
+    user = await AsyncAuthService.update_user(db, current_user.id, user_update)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
 
 @router.get("/{user_id}", response_model=User)
-async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+async def get_user_profile(user_id: str, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(UserModel).where(UserModel.id == user_id))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
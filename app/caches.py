@@ -0,0 +1,18 @@
+from app.api.categories import catalogue_cache
+from app.database import SessionLocal
+from app.services.principal_cache import principal_cache, token_cache
+from app.services.product_cache import product_cache
+from app.services.product_service import facet_cache, listing_cache
+
+def reset_caches():
+    """Empty every response and principal cache, including the shared
+    product detail tier when it is on, so the next requests take their
+    cold path. For tests and benchmarks; invalidation on writes is done
+    by the services themselves."""
+    listing_cache.invalidate()
+    facet_cache.clear()
+    catalogue_cache.invalidate()
+    principal_cache.clear()
+    token_cache.clear()
+    with SessionLocal() as db:
+        product_cache.clear(db)
@@ -1,16 +1,78 @@
 import os
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     database_url: str
     secret_key: str
+    password_hash_rounds: int = 12  # bcrypt cost; each +1 doubles the time
+    password_hash_workers: int = 4  # bcrypt releases the GIL; up to one per spare core
+    password_hash_max_queue: int = 32  # Beyond this, login/register answer 503
     access_token_expire_minutes: int = 15
     refresh_token_expire_days: int = 7
     upload_directory: str = "./uploads"
     max_file_size: int = 10485760  # 10MB
     allowed_image_types_str: str = "jpg,jpeg,png,webp"
     gst_verification_api_key: str
+    # Registry base URL, queried as GET {url}/{gstin}; unset, only the format is checked
+    gst_verification_url: Optional[str] = None
+    gst_verification_timeout_seconds: float = 10.0
+    gst_verification_max_connections: int = 10
+    gst_verification_rate_per_second: float = 5.0  # Across all lookups, per worker
+    gst_cache_size: int = 10000
+    gst_cache_ttl_seconds: int = 86400
+    gst_negative_cache_ttl_seconds: int = 600  # Unknown/inactive GSTINs
+    gst_batch_size: int = 100
+    gst_batch_chunk_size: int = 20  # Users verified per commit in a batch
+    async_pool_size: int = 10
+    async_max_overflow: int = 20
+    view_flush_interval_seconds: float = 5.0
+    view_flush_batch_size: int = 500
+    image_workers: int = 2
+    # Hand /uploads transfers to a fronting proxy, e.g. "/protected-uploads/"
+    # for an nginx internal location aliased to upload_directory
+    media_accel_redirect_prefix: Optional[str] = None
+    media_accel_redirect_header: str = "X-Accel-Redirect"
+    derivative_cache_directory: str = "./cache/derivatives"
+    derivative_cache_max_bytes: int = 1073741824  # 1GB
+    derivative_failure_ttl_seconds: int = 60  # Renders that failed aren't retried sooner
+    # The only widths/heights /images/{id} renders, so the cache can't be
+    # filled with every size in between
+    derivative_sizes_str: str = "64,128,256,320,480,640,800,1024,1280,1600,2400"
+    catalogue_cache_ttl_seconds: int = 300
+    facet_cache_size: int = 1000
+    facet_cache_ttl_seconds: int = 30
+    listing_cache_max_bytes: int = 67108864  # 64MB
+    listing_cache_ttl_seconds: int = 30
+    product_cache_size: int = 10000
+    product_cache_ttl_seconds: int = 300
+    # Read through the product_detail_cache table; enable with several workers
+    product_cache_shared: bool = False
+    product_cache_local_ttl_seconds: int = 5  # Local tier lifetime when shared
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: int = 60
+    realtime_backend: str = "memory"  # "memory" (single worker) or "postgres"
+    realtime_channel: str = "marketplace_events"
+    realtime_queue_size: int = 100
+    counter_reconcile_interval_seconds: float = 900.0
+    counter_compact_interval_seconds: float = 10.0  # Fold counter deltas this often
+    # Required in X-Admin-Key by the expensive admin operations; unset, they are disabled
+    admin_api_key: Optional[str] = None
+    # Expose each response's DB time and query count to clients; disable
+    # where that is considered sensitive (it is always in /metrics)
+    server_timing_header: bool = True
+    import_directory: str = "./imports"  # Spool files; not under the served uploads
+    max_import_size: int = 104857600  # 100MB
+    import_batch_size: int = 500
+    import_max_errors: int = 1000
+    import_workers: int = 2  # Imports running at once, per worker process
+    import_max_queue: int = 8  # Imports waiting beyond those; more get 429
+    import_heartbeat_seconds: float = 30.0
+    import_stale_after_seconds: float = 120.0  # Without a heartbeat, a job is failed
+    export_batch_size: int = 1000
+    export_max_concurrent: int = 2  # Per worker process; more get 503
+    export_statement_timeout_ms: int = 30000  # Per fetch of export_batch_size rows
+    export_idle_timeout_ms: int = 60000  # A client stalled longer loses its export
 
     class Config:
         env_file = ".env"
@@ -19,4 +81,8 @@ class Settings(BaseSettings):
     def allowed_image_types(self) -> List[str]:
         return [ext.strip() for ext in self.allowed_image_types_str.split(",")]
 
+    @property
+    def derivative_sizes(self) -> List[int]:
+        return sorted(int(size) for size in self.derivative_sizes_str.split(","))
+
 settings = Settings()
\ No newline at end of file
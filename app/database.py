@@ -1,15 +1,56 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.utils.metrics import instrument_engine
 
 engine = create_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine for the request path - same database, asyncpg driver
+async_engine = create_async_engine(
+    make_url(settings.database_url).set(drivername="postgresql+asyncpg"),
+    pool_size=settings.async_pool_size,
+    max_overflow=settings.async_max_overflow,
+    pool_pre_ping=True
+)
+# Exports hold a connection (and a server-side cursor) for as long as the
+# client takes to download, so they get a small pool of their own rather
+# than starving requests, and the server ends any that stall
+export_engine = create_async_engine(
+    make_url(settings.database_url).set(drivername="postgresql+asyncpg"),
+    pool_size=settings.export_max_concurrent,
+    max_overflow=0,
+    pool_pre_ping=True,
+    connect_args={"server_settings": {
+        "statement_timeout": str(settings.export_statement_timeout_ms),
+        "idle_in_transaction_session_timeout": str(settings.export_idle_timeout_ms)
+    }}
+)
+# Per-request query count, DB time and rows for /metrics and Server-Timing
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+instrument_engine(export_engine.sync_engine)
+
+# expire_on_commit=False so committed objects can still be serialized
+# once they are outside the session's greenlet
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
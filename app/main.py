@@ -1,9 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import Base, engine
-from app.api import auth, users, products, categories, conversations, admin
+from app.database import Base, engine, async_engine, export_engine
+from app.api import auth, users, products, categories, conversations, admin, images
 from app.config import settings
+from app.services.view_counter import view_counter
+from app.services.image_pipeline import image_pipeline
+from app.services.message_hub import message_hub
+from app.services.dashboard_counters import dashboard_counters
+from app.services.product_import import product_importer
+from app.services.image_derivatives import derivative_cache
+from app.services.password_hasher import password_hasher
+from app.services.gst_verifier import gst_verifier
+from app.utils.media import MediaFiles
+from app.utils.metrics import MetricsMiddleware, metrics
 import os
 
 # Create tables
@@ -19,10 +30,31 @@ upload_dirs = [
 for directory in upload_dirs:
     os.makedirs(directory, exist_ok=True)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    view_counter.start()
+    dashboard_counters.start()
+    product_importer.start()
+    await image_pipeline.start()
+    await derivative_cache.start()
+    await message_hub.start()
+    await categories.catalogue_cache.warm()
+    yield
+    await message_hub.stop()
+    await product_importer.stop()
+    await image_pipeline.stop()
+    await password_hasher.stop()
+    await gst_verifier.stop()
+    await view_counter.stop()
+    await dashboard_counters.stop()
+    await async_engine.dispose()
+    await export_engine.dispose()
+
 app = FastAPI(
     title="Manufacturing Marketplace API",
     description="API for B2B Manufacturing Marketplace",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -32,15 +64,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Did-You-Mean", "X-Before-Cursor", "X-After-Cursor"],
 )
 
-# Mount static files
-app.mount("/uploads", StaticFiles(directory=settings.upload_directory), name="uploads")
+# Outermost, so latency includes the other middleware
+app.add_middleware(MetricsMiddleware, server_timing=settings.server_timing_header)
+
+# Mount static files; blobs/ is content-addressed (see save_original_image)
+app.mount("/uploads", MediaFiles(
+    directory=settings.upload_directory,
+    immutable_prefixes=("blobs",),
+    accel_prefix=settings.media_accel_redirect_prefix,
+    accel_header=settings.media_accel_redirect_header
+), name="uploads")
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(products.router, prefix="/api/products", tags=["Products"])
+app.include_router(images.router, prefix="/api/images", tags=["Images"])
 app.include_router(categories.router, prefix="/api/categories", tags=["Categories"])
 app.include_router(conversations.router, prefix="/api/conversations", tags=["Conversations"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
@@ -49,6 +91,10 @@ app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 async def root():
     return {"message": "Manufacturing Marketplace API", "version": "1.0.0"}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
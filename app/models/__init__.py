@@ -2,15 +2,52 @@
 from .user import User, UserType
 from .category import Category, Material
 from .admin import AdminUser, AdminRole
+from .counter import StatCounter, StatCounterDelta
 
 # Import models with relationships
-from .product import Product, ProductImage, ProductCondition, ProductStatus
-from .conversation import Conversation, Message, ConversationStatus, MessageType
+from .product import (
+    Product, ProductImage, ImageBlob, CachedProductDetail,
+    ProductCondition, ProductStatus, ImageStatus, image_blob_ddl, product_detail_cache_ddl
+)
+from .conversation import Conversation, Message, ConversationStatus, MessageType, inbox_summary_ddl
+from .import_job import ImportJob, ImportJobStatus
+
+from sqlalchemy import event, inspect
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from sqlalchemy.sql.ddl import DDL
+from app.database import Base
+
+@event.listens_for(Base.metadata, "after_create")
+def add_missing_columns(target, connection, **kw):
+    """Add nullable/defaulted columns declared since a table was created"""
+    inspector = inspect(connection)
+    for table in target.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(DDL(f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {column_ddl}"))
+
+# Backfills and triggers that use the columns added above
+for statement in inbox_summary_ddl + image_blob_ddl + product_detail_cache_ddl:
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+@event.listens_for(Base.metadata, "after_create")
+def create_missing_indexes(target, connection, **kw):
+    """create_all() skips tables that already exist, so add any index
+    declared since the table was first created. Registered after the model
+    DDL listeners so columns they add exist by the time this runs."""
+    for table in target.sorted_tables:
+        for index in table.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
 
 __all__ = [
     "User", "UserType",
     "Category", "Material", 
-    "Product", "ProductImage", "ProductCondition", "ProductStatus",
+    "Product", "ProductImage", "ImageBlob", "CachedProductDetail",
+    "ProductCondition", "ProductStatus", "ImageStatus",
     "Conversation", "Message", "ConversationStatus", "MessageType",
-    "AdminUser", "AdminRole"
+    "ImportJob", "ImportJobStatus",
+    "AdminUser", "AdminRole",
+    "StatCounter", "StatCounterDelta"
 ]
\ No newline at end of file
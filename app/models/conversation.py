@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Numeric, Enum
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Integer, Numeric, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, query_expression
 import uuid
 from datetime import datetime
 import enum
@@ -15,6 +15,9 @@ class MessageType(str, enum.Enum):
     contact_share = "contact_share"
     offer = "offer"
 
+# Characters of the last message kept on the conversation for the inbox
+MESSAGE_PREVIEW_LENGTH = 200
+
 class Conversation(Base):
     __tablename__ = "conversations"
 
@@ -26,6 +29,26 @@ class Conversation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Inbox summary, maintained by ConversationService.send_message and
+    # mark_messages_as_read so the inbox never reads the messages table
+    last_activity_at = Column(DateTime, default=datetime.utcnow)
+    last_message_at = Column(DateTime)
+    last_message_preview = Column(String(MESSAGE_PREVIEW_LENGTH))
+    last_message_type = Column(Enum(MessageType))
+    last_message_sender_id = Column(UUID(as_uuid=True))
+    buyer_unread_count = Column(Integer, default=0, server_default="0", nullable=False)
+    seller_unread_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # Set by ConversationService.get_inbox
+    product_title = query_expression()
+    unread_count = query_expression()
+
+    __table_args__ = (
+        # One index per inbox side, matching its (last_activity_at, id) keyset
+        Index("ix_conversations_buyer_activity", "buyer_id", "last_activity_at", "id"),
+        Index("ix_conversations_seller_activity", "seller_id", "last_activity_at", "id"),
+    )
+
     # Relationships - using string references
     product = relationship("Product", back_populates="conversations")
     buyer = relationship("User", foreign_keys=[buyer_id], back_populates="buyer_conversations")
@@ -44,6 +67,37 @@ class Message(Base):
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Message history pages are keyset scans over this index
+        Index("ix_messages_conversation_created_at", "conversation_id", "created_at", "id"),
+    )
+
     # Relationships - using string references
     conversation = relationship("Conversation", back_populates="messages")
-    sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
\ No newline at end of file
+    sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
+
+# Fills the inbox summary for conversations created before it existed.
+# Registered in app/models/__init__.py after the columns are added.
+inbox_summary_ddl = [
+    f"""
+    UPDATE conversations c SET
+        last_activity_at = coalesce(latest.created_at, c.created_at, now() at time zone 'utc'),
+        last_message_at = latest.created_at,
+        last_message_preview = left(latest.message, {MESSAGE_PREVIEW_LENGTH}),
+        last_message_type = latest.message_type,
+        last_message_sender_id = latest.sender_id,
+        buyer_unread_count = (
+            SELECT count(*) FROM messages m
+            WHERE m.conversation_id = c.id AND m.sender_id <> c.buyer_id AND m.is_read IS NOT TRUE),
+        seller_unread_count = (
+            SELECT count(*) FROM messages m
+            WHERE m.conversation_id = c.id AND m.sender_id <> c.seller_id AND m.is_read IS NOT TRUE)
+    FROM conversations c2
+    LEFT JOIN LATERAL (
+        SELECT created_at, message, message_type, sender_id FROM messages
+        WHERE conversation_id = c2.id
+        ORDER BY created_at DESC LIMIT 1
+    ) latest ON true
+    WHERE c2.id = c.id AND c.last_activity_at IS NULL
+    """,
+]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, BigInteger, DateTime, Identity
+from app.database import Base
+
+class StatCounter(Base):
+    """Running totals kept by app/services/dashboard_counters.py; the
+    current value also includes the name's pending StatCounterDelta rows"""
+    __tablename__ = "stat_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0, server_default="0")
+    reconciled_at = Column(DateTime)
+
+class StatCounterDelta(Base):
+    """Changes to a StatCounter, appended by writers so they never contend
+    for the counter row; folded into stat_counters periodically"""
+    __tablename__ = "stat_counter_deltas"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    name = Column(String, nullable=False)
+    delta = Column(BigInteger, nullable=False)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text, Enum
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+import uuid
+from datetime import datetime
+import enum
+from app.database import Base
+
+class ImportJobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    seller_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(Enum(ImportJobStatus, native_enum=False), default=ImportJobStatus.queued, nullable=False)
+    format = Column(String, nullable=False)  # csv or jsonl
+    processed_rows = Column(Integer, default=0, nullable=False)
+    imported_rows = Column(Integer, default=0, nullable=False)
+    failed_rows = Column(Integer, default=0, nullable=False)
+    # [{"line": n, "error": "..."}], capped at settings.import_max_errors
+    errors = Column(JSONB, default=list, nullable=False)
+    error = Column(Text)  # Why the whole job failed, if it did
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    # Refreshed by the worker processing the job; a stale one means that worker died.
+    # Added to existing databases by add_missing_columns at startup; rows
+    # from before it are NULL, and recover() falls back to created_at.
+    heartbeat_at = Column(DateTime, default=datetime.utcnow)
@@ -1,11 +1,14 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Integer, Numeric, Date, Enum
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Integer, Numeric, Date, Enum, Index, LargeBinary, DDL, event, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, query_expression
 import uuid
 from datetime import datetime
 import enum
 from app.database import Base
 
+# Text search configuration used for both the stored vector and query parsing
+SEARCH_CONFIG = "english"
+
 class ProductCondition(str, enum.Enum):
     new = "new"
     like_new = "like_new"
@@ -19,6 +22,11 @@ class ProductStatus(str, enum.Enum):
     reserved = "reserved"
     inactive = "inactive"
 
+class ImageStatus(str, enum.Enum):
+    processing = "processing"
+    ready = "ready"
+    failed = "failed"
+
 class Product(Base):
     __tablename__ = "products"
 
@@ -44,6 +52,30 @@ class Product(Base):
     status = Column(Enum(ProductStatus), default=ProductStatus.active)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Maintained by the products_search_vector_update trigger (see below)
+    search_vector = Column(TSVECTOR)
+
+    # Populated by search queries via with_expression(), None otherwise
+    search_snippet = query_expression()
+    search_rank = query_expression()
+
+    __table_args__ = (
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        # Keyset pagination indexes, one per listing sort key
+        Index("ix_products_active_created_at", "created_at", "id", postgresql_where=text("is_active")),
+        Index("ix_products_active_updated_at", "updated_at", "id", postgresql_where=text("is_active")),
+        Index("ix_products_active_price", "price", "id", postgresql_where=text("is_active")),
+        Index("ix_products_active_views_count", "views_count", "id", postgresql_where=text("is_active")),
+        Index("ix_products_active_title", "title", "id", postgresql_where=text("is_active")),
+        Index("ix_products_seller_created_at", "seller_id", "created_at", "id"),
+        # Trigram indexes serve ilike '%x%' and fuzzy (%, %>) matching
+        Index("ix_products_title_trgm", "title", postgresql_using="gin",
+              postgresql_ops={"title": "gin_trgm_ops"}, postgresql_where=text("is_active")),
+        Index("ix_products_location_city_trgm", "location_city", postgresql_using="gin",
+              postgresql_ops={"location_city": "gin_trgm_ops"}, postgresql_where=text("is_active")),
+        Index("ix_products_location_state_trgm", "location_state", postgresql_using="gin",
+              postgresql_ops={"location_state": "gin_trgm_ops"}, postgresql_where=text("is_active")),
+    )
 
     # Relationships
     seller = relationship("User", back_populates="products")
@@ -52,17 +84,149 @@ class Product(Base):
     images = relationship("ProductImage", back_populates="product", cascade="all, delete-orphan")
     conversations = relationship("Conversation", back_populates="product")
 
+class ImageBlob(Base):
+    """One stored upload, keyed by the SHA-256 of its bytes.
+
+    Every ProductImage of the same bytes shares the blob's original and
+    variants. ref_count is the number of product_images rows pointing at
+    it, kept by the product_images_blob_ref_count trigger (see below).
+    """
+    __tablename__ = "image_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    original_path = Column(String, nullable=False)
+    file_size = Column(Integer)
+    mime_type = Column(String)
+    status = Column(Enum(ImageStatus, native_enum=False), default=ImageStatus.processing, nullable=False)
+    medium_path = Column(String)
+    thumbnail_path = Column(String)
+    ref_count = Column(Integer, default=0, server_default="0", nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class ProductImage(Base):
     __tablename__ = "product_images"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False)
+    # Null for images stored before content addressing, which own their files
+    blob_sha256 = Column(String(64), ForeignKey("image_blobs.sha256"), index=True)
     image_path = Column(String, nullable=False)
     image_name = Column(String, nullable=False)
     is_primary = Column(Boolean, default=False)
     file_size = Column(Integer)
     mime_type = Column(String)
+    # Variants are rendered off the request path; rows start as processing
+    status = Column(Enum(ImageStatus, native_enum=False), default=ImageStatus.ready,
+                    server_default=ImageStatus.ready.value, nullable=False, index=True)
+    medium_path = Column(String)
+    thumbnail_path = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    product = relationship("Product", back_populates="images")
\ No newline at end of file
+    product = relationship("Product", back_populates="images")
+
+class CachedProductDetail(Base):
+    """Shared tier of the product detail cache (app/services/product_cache.py).
+
+    Unlogged: it skips the WAL and is emptied after a crash, which only
+    costs cache misses."""
+    __tablename__ = "product_detail_cache"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    body = Column(LargeBinary)  # Serialized Product response; None once evicted
+    cached_at = Column(DateTime, nullable=False)
+    # Bumped by every eviction; a fill only lands on the version it started from
+    version = Column(Integer, nullable=False, server_default="0")
+
+# Full-text search vector: title (A) > category/material names (B) > description (C).
+# Kept in a trigger rather than a generated column because it reads the
+# category and material tables. The statements are idempotent and run on
+# every metadata.create_all(), which also upgrades existing databases
+# (indexes are added by the listener in app/models/__init__.py).
+search_vector_ddl = [
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""
+    CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(
+                (SELECT name FROM categories WHERE id = NEW.category_id), '')), 'B') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(
+                (SELECT name FROM materials WHERE id = NEW.material_id), '')), 'B') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS products_search_vector_trigger ON products",
+    """
+    CREATE TRIGGER products_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, category_id, material_id ON products
+    FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()
+    """,
+    # Renaming a category or material re-indexes the products that use it
+    """
+    CREATE OR REPLACE FUNCTION products_search_vector_refresh() RETURNS trigger AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'categories' THEN
+            UPDATE products SET category_id = category_id WHERE category_id = NEW.id;
+        ELSE
+            UPDATE products SET material_id = material_id WHERE material_id = NEW.id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS categories_search_vector_trigger ON categories",
+    """
+    CREATE TRIGGER categories_search_vector_trigger
+    AFTER UPDATE OF name ON categories
+    FOR EACH ROW EXECUTE FUNCTION products_search_vector_refresh()
+    """,
+    "DROP TRIGGER IF EXISTS materials_search_vector_trigger ON materials",
+    """
+    CREATE TRIGGER materials_search_vector_trigger
+    AFTER UPDATE OF name ON materials
+    FOR EACH ROW EXECUTE FUNCTION products_search_vector_refresh()
+    """,
+    "UPDATE products SET title = title WHERE search_vector IS NULL",
+]
+
+# body became nullable when evictions started keeping the row
+product_detail_cache_ddl = [
+    "ALTER TABLE product_detail_cache ALTER COLUMN body DROP NOT NULL",
+]
+
+# Blob reference counts follow product_images inserts and deletes, however
+# they happen (including the cascade when a product is deleted)
+image_blob_ddl = [
+    """
+    CREATE OR REPLACE FUNCTION product_images_blob_ref_count() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE image_blobs SET ref_count = ref_count + 1 WHERE sha256 = NEW.blob_sha256;
+        ELSE
+            UPDATE image_blobs SET ref_count = ref_count - 1 WHERE sha256 = OLD.blob_sha256;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS product_images_blob_ref_count_trigger ON product_images",
+    """
+    CREATE TRIGGER product_images_blob_ref_count_trigger
+    AFTER INSERT OR DELETE ON product_images
+    FOR EACH ROW EXECUTE FUNCTION product_images_blob_ref_count()
+    """,
+]
+
+# gin_trgm_ops must exist before the products table and its indexes are created
+event.listen(
+    Base.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+for statement in search_vector_ddl:
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
\ No newline at end of file
@@ -28,6 +28,7 @@ class User(Base):
     pincode = Column(String)
     is_verified = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
+    gst_checked_at = Column(DateTime)  # Last definite answer from the GST registry
     user_type = Column(Enum(UserType), default=UserType.both)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -37,4 +37,20 @@ class Conversation(ConversationBase):
     updated_at: datetime
     messages: List[Message] = []
 
+    model_config = ConfigDict(from_attributes=True)
+
+class ConversationSummary(BaseModel):
+    id: UUID
+    product_id: UUID
+    product_title: str
+    buyer_id: UUID
+    seller_id: UUID
+    status: ConversationStatus
+    last_activity_at: datetime
+    last_message_at: Optional[datetime] = None
+    last_message_preview: Optional[str] = None
+    last_message_type: Optional[MessageType] = None
+    last_message_sender_id: Optional[UUID] = None
+    unread_count: int
+
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -3,7 +3,8 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, date
 from decimal import Decimal
 from uuid import UUID
-from app.models.product import ProductCondition, ProductStatus
+from app.models.product import ProductCondition, ProductStatus, ImageStatus
+from app.models.import_job import ImportJobStatus
 
 class ProductImageBase(BaseModel):
     image_name: str
@@ -15,10 +16,17 @@ class ProductImage(ProductImageBase):
     image_path: str
     file_size: Optional[int] = None
     mime_type: Optional[str] = None
+    status: ImageStatus = ImageStatus.ready
+    medium_path: Optional[str] = None
+    thumbnail_path: Optional[str] = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
+class ProductImageUpload(BaseModel):
+    uploaded_count: int
+    images: List[ProductImage]
+
 class ProductBase(BaseModel):
     title: str = Field(..., min_length=5, max_length=200)
     description: str = Field(..., min_length=10)
@@ -80,5 +88,27 @@ class ProductListItem(BaseModel):
     status: ProductStatus
     created_at: datetime
     primary_image: Optional[str] = None
+    # Highlighted description fragment, only set for text searches
+    snippet: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ProductSuggestions(BaseModel):
+    query: List[str] = []
+    city: List[str] = []
+    state: List[str] = []
+
+class ProductImportJob(BaseModel):
+    id: UUID
+    status: ImportJobStatus
+    format: str
+    processed_rows: int
+    imported_rows: int
+    failed_rows: int
+    errors: List[Dict[str, Any]] = []
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
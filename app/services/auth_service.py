@@ -1,18 +1,22 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
-from app.schemas.user import UserCreate
+from app.schemas.user import UserCreate, UserUpdate
+from app.services.gst_verifier import gst_verifier
+from app.services.password_hasher import password_hasher
+from app.services.principal_cache import invalidate_principal
 from app.utils.security import get_password_hash, verify_password
-from app.utils.validators import verify_gst_number
+from datetime import datetime
 from typing import Optional
+from uuid import UUID
 
 class AuthService:
     @staticmethod
-    def create_user(db: Session, user_create: UserCreate) -> User:
-        hashed_password = get_password_hash(user_create.password)
+    def create_user(db: Session, user_create: UserCreate, password_hash: Optional[str] = None) -> User:
         db_user = User(
             email=user_create.email,
             phone=user_create.phone,
-            password_hash=hashed_password,
+            password_hash=password_hash or get_password_hash(user_create.password),
             company_name=user_create.company_name,
             contact_person=user_create.contact_person,
             gst_number=user_create.gst_number,
@@ -35,6 +39,30 @@ class AuthService:
             return None
         return user
 
+    @staticmethod
+    def get_user_by_id(db: Session, user_id: UUID) -> Optional[User]:
+        return db.get(User, user_id)
+
+    @staticmethod
+    def set_password_hash(db: Session, user: User, password_hash: str):
+        user.password_hash = password_hash
+        db.commit()
+
+    @staticmethod
+    def update_user(db: Session, user_id: UUID, user_update: UserUpdate) -> Optional[User]:
+        user = db.get(User, user_id)
+        if not user:
+            return None
+        
+        update_data = user_update.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(user, field, value)
+        
+        db.commit()
+        db.refresh(user)
+        invalidate_principal(user.id)
+        return user
+
     @staticmethod
     def get_user_by_email(db: Session, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
@@ -53,10 +81,57 @@ class AuthService:
         if not user:
             return {"success": False, "message": "User not found"}
         
-        verification_result = await verify_gst_number(user.gst_number)
+        # Raises RegistryUnavailable if the registry can't answer
+        verification_result = await gst_verifier.verify(user.gst_number)
+        user.gst_checked_at = datetime.utcnow()
         if verification_result["valid"]:
             user.is_verified = True
             db.commit()
+            invalidate_principal(user.id)
             return {"success": True, "message": "GST verified successfully"}
         
-        return {"success": False, "message": "GST verification failed"}
\ No newline at end of file
+        db.commit()
+        return {"success": False, "message": "GST verification failed"}
+
+class AsyncAuthService:
+    """AsyncSession variants of AuthService (see AsyncProductService)."""
+
+    @staticmethod
+    async def create_user(db: AsyncSession, user_create: UserCreate) -> User:
+        # Hashed in the password_hasher pool; raises HasherSaturated when full
+        password_hash = await password_hasher.hash(user_create.password)
+        return await db.run_sync(AuthService.create_user, user_create, password_hash)
+
+    @staticmethod
+    async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+        """AuthService.authenticate_user with the bcrypt check off the event
+        loop. Rehashes the password if the configured cost has changed."""
+        user = await AsyncAuthService.get_user_by_email(db, email)
+        if not user:
+            return None
+        valid, new_hash = await password_hasher.verify(password, user.password_hash)
+        if not valid:
+            return None
+        if new_hash:
+            await db.run_sync(AuthService.set_password_hash, user, new_hash)
+        return user
+
+    @staticmethod
+    async def get_user_by_id(db: AsyncSession, user_id: UUID) -> Optional[User]:
+        return await db.run_sync(AuthService.get_user_by_id, user_id)
+
+    @staticmethod
+    async def update_user(db: AsyncSession, user_id: UUID, user_update: UserUpdate) -> Optional[User]:
+        return await db.run_sync(AuthService.update_user, user_id, user_update)
+
+    @staticmethod
+    async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+        return await db.run_sync(AuthService.get_user_by_email, email)
+
+    @staticmethod
+    async def get_user_by_gst(db: AsyncSession, gst_number: str) -> Optional[User]:
+        return await db.run_sync(AuthService.get_user_by_gst, gst_number)
+
+    @staticmethod
+    async def get_user_by_phone(db: AsyncSession, phone: str) -> Optional[User]:
+        return await db.run_sync(AuthService.get_user_by_phone, phone)
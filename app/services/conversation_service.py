@@ -1,10 +1,17 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
-from app.models.conversation import Conversation, Message
+from sqlalchemy.orm import Session, joinedload, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, asc, case, desc, select, tuple_, union
+from app.models.conversation import Conversation, Message, MESSAGE_PREVIEW_LENGTH
 from app.models.product import Product
 from app.schemas.conversation import ConversationCreate, MessageCreate
+from app.utils.pagination import encode_cursor, decode_cursor
 from typing import Optional, List
 from uuid import UUID
+from datetime import datetime
+
+INBOX_SORT_KEY = "last_activity_at"
+MESSAGE_SORT_KEY = "created_at"
 
 class ConversationService:
     @staticmethod
@@ -51,8 +58,55 @@ class ConversationService:
         ).all()
 
     @staticmethod
-    def get_conversation(db: Session, conversation_id: UUID, user_id: UUID) -> Optional[Conversation]:
-        return db.query(Conversation).filter(
+    def get_inbox(db: Session, user_id: UUID, limit: int = 20, cursor: Optional[str] = None) -> List[Conversation]:
+        """A page of the user's conversations, most recently active first.
+
+        Reads only the denormalized summary columns: each side of the inbox
+        is a range scan on its (participant, last_activity_at, id) index.
+        """
+        after = decode_cursor(cursor, INBOX_SORT_KEY, True) if cursor else None
+        sides = []
+        for participant in (Conversation.buyer_id, Conversation.seller_id):
+            side = select(Conversation.id, Conversation.last_activity_at).where(participant == user_id)
+            if after:
+                side = side.where(tuple_(Conversation.last_activity_at, Conversation.id) < tuple_(*after))
+            sides.append(side.order_by(desc(Conversation.last_activity_at), desc(Conversation.id)).limit(limit))
+        page = union(*sides).subquery()
+        
+        unread_count = case(
+            (Conversation.buyer_id == user_id, Conversation.buyer_unread_count),
+            else_=Conversation.seller_unread_count
+        )
+        return db.query(Conversation).join(
+            page, page.c.id == Conversation.id
+        ).join(
+            Product, Product.id == Conversation.product_id
+        ).options(
+            with_expression(Conversation.product_title, Product.title),
+            with_expression(Conversation.unread_count, unread_count)
+        ).order_by(
+            desc(Conversation.last_activity_at), desc(Conversation.id)
+        ).limit(limit).all()
+
+    @staticmethod
+    def next_inbox_cursor(conversations: List[Conversation], limit: int) -> Optional[str]:
+        """Cursor for the inbox page after `conversations`, or None on the last page"""
+        if not conversations or len(conversations) < limit:
+            return None
+        last = conversations[-1]
+        return encode_cursor(INBOX_SORT_KEY, True, last.last_activity_at, last.id)
+
+    @staticmethod
+    def get_conversation(
+        db: Session,
+        conversation_id: UUID,
+        user_id: UUID,
+        limit: int = 50,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> Optional[Conversation]:
+        """The conversation with one page of its messages (see get_messages)"""
+        conversation = db.query(Conversation).filter(
             and_(
                 Conversation.id == conversation_id,
                 or_(
@@ -61,9 +115,44 @@ class ConversationService:
                 )
             )
         ).options(
-            joinedload(Conversation.messages),
             joinedload(Conversation.product)
         ).first()
+        
+        if conversation:
+            messages = ConversationService.get_messages(db, conversation_id, limit, before, after)
+            # Populate the collection without marking it changed
+            set_committed_value(conversation, "messages", messages)
+        return conversation
+
+    @staticmethod
+    def get_messages(
+        db: Session,
+        conversation_id: UUID,
+        limit: int = 50,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> List[Message]:
+        """Up to `limit` messages in chronological order: the newest ones, or
+        those just before/after a message cursor. Keyset on (created_at, id)."""
+        if before and after:
+            raise ValueError("Use either before or after, not both")
+        
+        query_filter = db.query(Message).filter(Message.conversation_id == conversation_id)
+        position = tuple_(Message.created_at, Message.id)
+        if after:
+            query_filter = query_filter.filter(position > tuple_(*decode_cursor(after, MESSAGE_SORT_KEY, False)))
+            return query_filter.order_by(asc(Message.created_at), asc(Message.id)).limit(limit).all()
+        
+        if before:
+            query_filter = query_filter.filter(position < tuple_(*decode_cursor(before, MESSAGE_SORT_KEY, False)))
+        messages = query_filter.order_by(desc(Message.created_at), desc(Message.id)).limit(limit).all()
+        messages.reverse()
+        return messages
+
+    @staticmethod
+    def message_cursor(message: Message) -> str:
+        """Cursor pointing at `message`, usable as before or after"""
+        return encode_cursor(MESSAGE_SORT_KEY, False, message.created_at, message.id)
 
     @staticmethod
     def send_message(db: Session, conversation_id: UUID, sender_id: UUID, message_create: MessageCreate) -> Optional[Message]:
@@ -84,25 +173,101 @@ class ConversationService:
         db_message = Message(
             conversation_id=conversation_id,
             sender_id=sender_id,
+            created_at=datetime.utcnow(),
             **message_create.model_dump()
         )
         db.add(db_message)
+        
+        # Keep the inbox summary current in the same transaction
+        conversation.last_activity_at = db_message.created_at
+        conversation.last_message_at = db_message.created_at
+        conversation.last_message_preview = db_message.message[:MESSAGE_PREVIEW_LENGTH]
+        conversation.last_message_type = db_message.message_type
+        conversation.last_message_sender_id = sender_id
+        if sender_id == conversation.buyer_id:
+            conversation.seller_unread_count = Conversation.seller_unread_count + 1
+        else:
+            conversation.buyer_unread_count = Conversation.buyer_unread_count + 1
         db.commit()
         db.refresh(db_message)
         return db_message
 
     @staticmethod
-    def mark_messages_as_read(db: Session, conversation_id: UUID, user_id: UUID):
+    def mark_messages_as_read(db: Session, conversation_id: UUID, user_id: UUID) -> int:
         # Mark messages as read where user is the receiver
         conversation = db.query(Conversation).filter(Conversation.id == conversation_id).first()
         if not conversation:
-            return
+            return 0
         
-        db.query(Message).filter(
+        marked = db.query(Message).filter(
             and_(
                 Message.conversation_id == conversation_id,
                 Message.sender_id != user_id,
                 Message.is_read == False
             )
         ).update({"is_read": True})
-        db.commit()
\ No newline at end of file
+        
+        if user_id == conversation.buyer_id:
+            conversation.buyer_unread_count = 0
+        if user_id == conversation.seller_id:
+            conversation.seller_unread_count = 0
+        db.commit()
+        return marked
+
+    @staticmethod
+    def get_counterpart(db: Session, conversation_id: UUID, user_id: UUID) -> Optional[UUID]:
+        """The other participant of a conversation the user takes part in"""
+        participants = db.query(Conversation.buyer_id, Conversation.seller_id).filter(
+            and_(
+                Conversation.id == conversation_id,
+                or_(
+                    Conversation.buyer_id == user_id,
+                    Conversation.seller_id == user_id
+                )
+            )
+        ).first()
+        if not participants:
+            return None
+        return participants.seller_id if participants.buyer_id == user_id else participants.buyer_id
+
+class AsyncConversationService:
+    """AsyncSession variants of ConversationService (see AsyncProductService)."""
+
+    @staticmethod
+    async def create_conversation(db: AsyncSession, conversation_create: ConversationCreate, buyer_id: UUID) -> Optional[Conversation]:
+        def _create(session: Session) -> Optional[Conversation]:
+            conversation = ConversationService.create_conversation(session, conversation_create, buyer_id)
+            if conversation:
+                conversation.messages
+            return conversation
+        return await db.run_sync(_create)
+
+    @staticmethod
+    async def get_user_conversations(db: AsyncSession, user_id: UUID) -> List[Conversation]:
+        return await db.run_sync(ConversationService.get_user_conversations, user_id)
+
+    @staticmethod
+    async def get_inbox(db: AsyncSession, user_id: UUID, limit: int = 20, cursor: Optional[str] = None) -> List[Conversation]:
+        return await db.run_sync(ConversationService.get_inbox, user_id, limit, cursor)
+
+    @staticmethod
+    async def get_conversation(db: AsyncSession, conversation_id: UUID, user_id: UUID, *args, **kwargs) -> Optional[Conversation]:
+        return await db.run_sync(ConversationService.get_conversation, conversation_id, user_id, *args, **kwargs)
+
+    @staticmethod
+    async def send_message(db: AsyncSession, conversation_id: UUID, sender_id: UUID, message_create: MessageCreate) -> Optional[Message]:
+        def _send(session: Session) -> Optional[Message]:
+            message = ConversationService.send_message(session, conversation_id, sender_id, message_create)
+            if message:
+                # Loaded for the realtime recipients
+                message.conversation
+            return message
+        return await db.run_sync(_send)
+
+    @staticmethod
+    async def mark_messages_as_read(db: AsyncSession, conversation_id: UUID, user_id: UUID) -> int:
+        return await db.run_sync(ConversationService.mark_messages_as_read, conversation_id, user_id)
+
+    @staticmethod
+    async def get_counterpart(db: AsyncSession, conversation_id: UUID, user_id: UUID) -> Optional[UUID]:
+        return await db.run_sync(ConversationService.get_counterpart, conversation_id, user_id)
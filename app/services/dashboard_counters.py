@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import event, func, inspect, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import async_engine
+from app.models.counter import StatCounter, StatCounterDelta
+from app.models.product import Product, ProductStatus
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# name -> (model, column, value): rows of model whose column equals value,
+# or every row when column is None
+COUNTERS = {
+    "total_users": (User, None, None),
+    "verified_users": (User, "is_verified", True),
+    "active_users": (User, "is_active", True),
+    "total_products": (Product, None, None),
+    "active_products": (Product, "is_active", True),
+    **{f"products_status_{status.value}": (Product, "status", status) for status in ProductStatus},
+}
+
+# Folded value plus pending deltas, per counter
+COUNTER_TOTALS_SQL = text("""
+    SELECT name, sum(value)::bigint FROM (
+        SELECT name, value FROM stat_counters
+        UNION ALL
+        SELECT name, delta FROM stat_counter_deltas
+    ) AS changes GROUP BY name
+""")
+
+# Moves the committed deltas into stat_counters in one short transaction;
+# deltas committed meanwhile aren't visible to the DELETE and wait for the
+# next run
+COMPACT_DELTAS_SQL = text("""
+    WITH moved AS (
+        DELETE FROM stat_counter_deltas RETURNING name, delta
+    )
+    INSERT INTO stat_counters (name, value)
+    SELECT name, sum(delta) FROM moved GROUP BY name ORDER BY name
+    ON CONFLICT (name) DO UPDATE SET value = stat_counters.value + EXCLUDED.value
+""")
+
+# Arbitrary pg_advisory_xact_lock key; one worker reconciles at a time
+RECONCILE_LOCK_KEY = 7352101
+
+def _counts(obj, column: Optional[str], value) -> bool:
+    return column is None or getattr(obj, column) == value
+
+@event.listens_for(Session, "after_flush")
+def track_counter_changes(session: Session, flush_context):
+    """Record counter deltas in the same transaction as any flush that adds,
+    removes or changes a counted row, whichever service did the write.
+    Deltas are inserted rather than added to the counter rows, so
+    concurrent writers never wait on each other's counter locks.
+
+    Changes to a column that wasn't loaded before being set have no old
+    value to compare with and are left to reconciliation.
+    """
+    deltas = Counter()
+    for name, (model, column, value) in COUNTERS.items():
+        for obj in session.new:
+            if isinstance(obj, model) and _counts(obj, column, value):
+                deltas[name] += 1
+        for obj in session.deleted:
+            if isinstance(obj, model) and _counts(obj, column, value):
+                deltas[name] -= 1
+        if column is None:
+            continue
+        for obj in session.dirty:
+            if isinstance(obj, model):
+                history = inspect(obj).attrs[column].history
+                if history.added and history.deleted:
+                    deltas[name] += (history.added[0] == value) - (history.deleted[0] == value)
+
+    changes = [{"name": name, "delta": delta} for name, delta in sorted(deltas.items()) if delta]
+    if changes:
+        session.connection().execute(insert(StatCounterDelta), changes)
+
+class DashboardCounters:
+    """Reads the maintained counters and keeps them compact and correct.
+
+    Writers append deltas (see track_counter_changes), so the dashboard
+    reads a handful of rows instead of scanning users and products. Every
+    compact_interval the committed deltas are folded into stat_counters.
+    Writes that bypass the ORM (bulk inserts, manual SQL) make the totals
+    drift; every `interval` the tables are recounted and the drift is
+    appended as one more delta.
+    """
+
+    def __init__(self, interval: float, compact_interval: float):
+        self.interval = interval
+        self.compact_interval = compact_interval
+        self._task: Optional[asyncio.Task] = None
+        self.reconcile_count = 0
+        self.compacted_deltas = 0
+        self.last_drift: Dict[str, int] = {}
+        self.last_reconciled_at: Optional[datetime] = None
+
+    async def read(self, db: AsyncSession) -> Dict[str, int]:
+        values = dict((await db.execute(COUNTER_TOTALS_SQL)).all())
+        return {name: values.get(name, 0) for name in COUNTERS}
+
+    async def compact(self) -> int:
+        async with async_engine.begin() as conn:
+            result = await conn.execute(COMPACT_DELTAS_SQL)
+        self.compacted_deltas += max(result.rowcount, 0)
+        return result.rowcount
+
+    async def reconcile(self) -> bool:
+        """Recount everything; False if another worker is already doing it"""
+        # The counts and the stored totals are read in one REPEATABLE READ
+        # snapshot, so both see exactly the same writes and no row locks
+        # are needed: writers carry on while the tables are scanned
+        async with async_engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="REPEATABLE READ")
+            async with conn.begin():
+                if not await conn.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": RECONCILE_LOCK_KEY}):
+                    return False
+                stored = dict((await conn.execute(COUNTER_TOTALS_SQL)).all())
+
+                # One scan per table, counting every predicate at once
+                by_model = defaultdict(list)
+                for name, (model, column, value) in COUNTERS.items():
+                    condition = getattr(model, column) == value if column else None
+                    by_model[model].append((name, condition))
+                actual = {}
+                for model, counters in by_model.items():
+                    columns = [
+                        func.count().filter(condition) if condition is not None else func.count()
+                        for _, condition in counters
+                    ]
+                    row = (await conn.execute(select(*columns).select_from(model))).one()
+                    actual.update(zip([name for name, _ in counters], row))
+
+        # Corrections are relative, so writes committed since the snapshot
+        # still count; this transaction is short
+        drift = {name: count - stored.get(name, 0) for name, count in actual.items() if count != stored.get(name, 0)}
+        now = datetime.utcnow()
+        async with async_engine.begin() as conn:
+            if drift:
+                await conn.execute(insert(StatCounterDelta), [
+                    {"name": name, "delta": delta} for name, delta in sorted(drift.items())
+                ])
+            await conn.execute(update(StatCounter).values(reconciled_at=now))
+
+        self.last_drift = {name: delta for name, delta in drift.items() if name in stored}
+        if self.last_drift:
+            logger.warning("Corrected dashboard counter drift: %s", self.last_drift)
+        self.reconcile_count += 1
+        self.last_reconciled_at = now
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_reconcile = loop.time()
+        while True:
+            try:
+                if loop.time() >= next_reconcile:
+                    next_reconcile = loop.time() + self.interval
+                    await self.reconcile()
+                await self.compact()
+            except Exception:
+                logger.exception("Failed to maintain dashboard counters")
+            await asyncio.sleep(self.compact_interval)
+
+    def start(self):
+        # The first run also seeds the counters on a new database
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "reconcile_count": self.reconcile_count,
+            "compacted_deltas": self.compacted_deltas,
+            "last_reconciled_at": self.last_reconciled_at,
+            "last_drift": self.last_drift
+        }
+
+dashboard_counters = DashboardCounters(
+    settings.counter_reconcile_interval_seconds,
+    settings.counter_compact_interval_seconds
+)
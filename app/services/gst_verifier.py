@@ -0,0 +1,290 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+import httpx
+from sqlalchemy import select
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.principal_cache import invalidate_principal
+from app.utils.cache import TTLCache
+from app.utils.validators import validate_gst_number
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCHES = 20  # Finished batches kept for GET /admin/users/verify-gst/{id}
+
+class RegistryUnavailable(Exception):
+    """The registry timed out, rate limited us or failed; worth retrying later"""
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart, across all callers.
+
+    Callers that would have to wait longer than max_wait for their turn
+    are turned away with RegistryUnavailable instead of booking a slot,
+    so a burst can't queue lookups further and further into the future.
+    """
+
+    def __init__(self, rate: float, max_wait: float):
+        self.interval = 1 / rate
+        self.max_wait = max_wait
+        self.rejected = 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next - now
+            if delay > self.max_wait:
+                self.rejected += 1
+                raise RegistryUnavailable(f"Rate limited, next registry call in {delay:.1f}s")
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+@dataclass
+class VerificationBatch:
+    """Progress of one start_batch() run"""
+    id: UUID
+    limit: int
+    status: str = "running"  # running, completed, failed or cancelled
+    total: int = 0
+    checked: int = 0
+    verified: int = 0
+    rejected: int = 0
+    unavailable: int = 0
+    error: Optional[str] = None
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+class GSTVerifier:
+    """Verifies GSTINs against the registry at gst_verification_url.
+
+    The registry is slow and rate limited, so:
+    - every call shares one httpx.AsyncClient (a pooled set of keep-alive
+      connections) and one RateLimiter, which turns away lookups that
+      would wait longer than the timeout for their turn;
+    - results are cached, registered GSTINs for positive_ttl and unknown
+      or inactive ones for the shorter negative_ttl; registry failures
+      are not cached;
+    - concurrent lookups of the same GSTIN share one request.
+
+    The registry contract is GET {url}/{gstin} with the X-API-Key header:
+    200 with {"legal_name", "status"} for a registered GSTIN, 404 for an
+    unknown one. Without a URL only the format is checked (development).
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        api_key: str,
+        positive_ttl: float,
+        negative_ttl: float,
+        cache_size: int,
+        rate: float,
+        max_connections: int,
+        timeout: float,
+        batch_chunk_size: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.url = url.rstrip("/") if url else None
+        self.api_key = api_key
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.transport = transport
+        self._cache = TTLCache(cache_size, max(positive_ttl, negative_ttl))
+        self._limiter = RateLimiter(rate, max_wait=timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.batch_chunk_size = batch_chunk_size
+        self._batches: "OrderedDict[UUID, VerificationBatch]" = OrderedDict()
+        self._batch_task: Optional[asyncio.Task] = None
+        self.registry_calls = 0
+        self.registry_failures = 0
+        self.coalesced = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.url,
+                headers={"X-API-Key": self.api_key},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                transport=self.transport
+            )
+        return self._client
+
+    async def verify(self, gst_number: str) -> dict:
+        """{"valid": bool, ...}; raises RegistryUnavailable if the registry
+        couldn't answer"""
+        if not validate_gst_number(gst_number):
+            return {"valid": False, "message": "Invalid GST format"}
+        if self.url is None:
+            return {"valid": True, "company_name": "Mock Company Name", "status": "Active"}
+
+        result = self._cache.get(gst_number)
+        if result is not None:
+            return result
+        task = self._pending.get(gst_number)
+        if task is None:
+            task = asyncio.create_task(self._lookup(gst_number))
+            self._pending[gst_number] = task
+            task.add_done_callback(lambda _: self._pending.pop(gst_number, None))
+        else:
+            self.coalesced += 1
+        # Shielded so one caller giving up doesn't cancel the others' lookup
+        return await asyncio.shield(task)
+
+    async def _lookup(self, gst_number: str) -> dict:
+        await self._limiter.wait()
+        self.registry_calls += 1
+        try:
+            response = await self._get_client().get(f"/{gst_number}")
+        except httpx.HTTPError as e:
+            self.registry_failures += 1
+            raise RegistryUnavailable(str(e) or type(e).__name__)
+
+        if response.status_code == 404:
+            result = {"valid": False, "message": "GST number not registered"}
+        elif response.status_code == 200:
+            try:
+                record = response.json()
+                registry_status = record["status"]
+            except (ValueError, TypeError, KeyError):
+                # Not the registry's JSON (a proxy's error page, say)
+                self.registry_failures += 1
+                raise RegistryUnavailable("Registry answered 200 without a status")
+            result = {
+                "valid": registry_status == "Active",
+                "company_name": record.get("legal_name"),
+                "status": registry_status
+            }
+        else:
+            self.registry_failures += 1
+            raise RegistryUnavailable(f"Registry answered {response.status_code}")
+
+        self._cache.set(gst_number, result, self.positive_ttl if result["valid"] else self.negative_ttl)
+        return result
+
+    def start_batch(self, limit: int) -> VerificationBatch:
+        """Verify up to `limit` active, unverified users in the background,
+        least recently checked first, committing every batch_chunk_size
+        users. Only one batch runs at a time per worker; while one does, it
+        is returned instead of starting another."""
+        if self._batch_task is not None and not self._batch_task.done():
+            return next(reversed(self._batches.values()))
+        batch = VerificationBatch(id=uuid4(), limit=limit)
+        self._batches[batch.id] = batch
+        while len(self._batches) > MAX_BATCHES:
+            self._batches.popitem(last=False)
+        self._batch_task = asyncio.create_task(self._run_batch(batch))
+        return batch
+
+    def get_batch(self, batch_id: UUID) -> Optional[VerificationBatch]:
+        """One of the last MAX_BATCHES batches started by this worker"""
+        return self._batches.get(batch_id)
+
+    async def _run_batch(self, batch: VerificationBatch):
+        try:
+            async with AsyncSessionLocal() as db:
+                user_ids = (await db.execute(
+                    select(User.id)
+                    .where(User.is_verified == False, User.is_active == True)
+                    .order_by(User.gst_checked_at.asc().nulls_first(), User.created_at)
+                    .limit(batch.limit)
+                )).scalars().all()
+            batch.total = len(user_ids)
+            for i in range(0, len(user_ids), self.batch_chunk_size):
+                await self._verify_chunk(batch, user_ids[i:i + self.batch_chunk_size])
+            batch.status = "completed"
+        except asyncio.CancelledError:
+            batch.status = "cancelled"
+            raise
+        except Exception as e:
+            logger.exception("GST verification batch %s failed", batch.id)
+            batch.status = "failed"
+            batch.error = str(e) or type(e).__name__
+        finally:
+            batch.finished_at = datetime.utcnow()
+            if batch.unavailable:
+                logger.warning("GST registry unavailable for %d users", batch.unavailable)
+
+    async def _verify_chunk(self, batch: VerificationBatch, user_ids: List[UUID]):
+        """Users the registry couldn't be asked about stay first in line"""
+        async with AsyncSessionLocal() as db:
+            users: List[User] = (await db.execute(
+                select(User).where(User.id.in_(user_ids), User.is_verified == False)
+            )).scalars().all()
+
+            async def check(user: User) -> Optional[dict]:
+                try:
+                    return await self.verify(user.gst_number)
+                except RegistryUnavailable:
+                    return None
+
+            # Concurrency is bounded by the connection pool, pace by the rate limiter
+            results = await asyncio.gather(*[check(user) for user in users])
+
+            now = datetime.utcnow()
+            verified = []
+            for user, result in zip(users, results):
+                if result is None:
+                    batch.unavailable += 1
+                    continue
+                user.gst_checked_at = now
+                if result["valid"]:
+                    user.is_verified = True
+                    verified.append(user.id)
+                    batch.verified += 1
+                else:
+                    batch.rejected += 1
+            await db.commit()
+
+        batch.checked += len(users)
+        for user_id in verified:
+            invalidate_principal(user_id)
+
+    async def stop(self):
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+            self._batch_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "registry": self.url,
+            "registry_calls": self.registry_calls,
+            "registry_failures": self.registry_failures,
+            "coalesced": self.coalesced,
+            "rate_limited": self._limiter.rejected,
+            "in_flight": len(self._pending),
+            "cache": self._cache.stats()
+        }
+
+gst_verifier = GSTVerifier(
+    settings.gst_verification_url,
+    settings.gst_verification_api_key,
+    settings.gst_cache_ttl_seconds,
+    settings.gst_negative_cache_ttl_seconds,
+    settings.gst_cache_size,
+    settings.gst_verification_rate_per_second,
+    settings.gst_verification_max_connections,
+    settings.gst_verification_timeout_seconds,
+    settings.gst_batch_chunk_size
+)
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import shutil
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+from uuid import UUID
+from fastapi.concurrency import run_in_threadpool
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.image_pipeline import image_pipeline
+from app.models.product import ImageStatus, ProductImage
+from app.services.product_service import AsyncProductService
+from app.utils.cache import TTLCache
+from app.utils.image_processing import render_derivative
+
+FAILURE_CACHE_SIZE = 10000
+
+class UnrenderableImage(Exception):
+    """The original can't be decoded, so no derivative of it can be rendered"""
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    image_id: UUID
+    width: Optional[int]
+    height: Optional[int]
+    fit: str
+    image_format: str
+
+    @property
+    def filename(self) -> str:
+        # <image_id>/<w>x<h>-<fit>.<format>, 0 for an unbounded side
+        return os.path.join(
+            str(self.image_id),
+            f"{self.width or 0}x{self.height or 0}-{self.fit}.{self.image_format}"
+        )
+
+def _remove_files(paths: list):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+class DerivativeCache:
+    """Renders image derivatives on first request and keeps them on disk.
+
+    Files are evicted least recently used first once they exceed max_bytes.
+    Concurrent requests for the same derivative share one render, and a
+    render that failed is remembered for failure_ttl seconds instead of
+    being retried on every request. The LRU
+    index and the in-flight renders are per worker: with several workers
+    the directory can hold up to one cap per worker, and a derivative may
+    be rendered once per worker before it lands on disk.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, failure_ttl: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._failures = TTLCache(FAILURE_CACHE_SIZE, failure_ttl)  # path -> error
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # path -> size
+        self._total_bytes = 0
+        self._renders: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.renders = 0
+        self.failed_renders = 0
+        self.evictions = 0
+
+    def _scan(self) -> list:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(".tmp"):
+                    # Left behind by a render that died mid-write
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                entries.append((stat.st_atime, path, stat.st_size))
+        return sorted(entries)
+
+    async def start(self):
+        """Rebuild the LRU index from the files already on disk"""
+        os.makedirs(self.directory, exist_ok=True)
+        for _, path, size in await run_in_threadpool(self._scan):
+            self._entries[path] = size
+            self._total_bytes += size
+        await self._evict()
+
+    def _add(self, path: str, size: int):
+        self._total_bytes += size - self._entries.pop(path, 0)
+        self._entries[path] = size
+
+    async def _evict(self):
+        # Index updates stay on the event loop; only the unlinks are offloaded
+        evicted = []
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            path, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(path)
+        if evicted:
+            self.evictions += len(evicted)
+            await run_in_threadpool(_remove_files, evicted)
+
+    async def get(self, spec: DerivativeSpec) -> str:
+        """Path of the rendered derivative; LookupError if the image doesn't
+        exist or is still processing, UnrenderableImage if its original
+        can't be decoded. The image is looked up on hits too: the URLs are
+        cached as immutable, so a deleted image's derivatives must stop
+        being served."""
+        async with AsyncSessionLocal() as db:
+            image = await AsyncProductService.get_image(db, spec.image_id)
+        if image is None:
+            await self._discard(spec.image_id)
+            raise LookupError(spec.image_id)
+        if image.status == ImageStatus.processing:
+            raise LookupError(spec.image_id)
+        if image.status == ImageStatus.failed:
+            raise UnrenderableImage(spec.image_id)
+
+        path = os.path.join(self.directory, spec.filename)
+        error = self._failures.get(path)
+        if error is not None:
+            raise UnrenderableImage(error)
+        if path in self._entries and os.path.exists(path):
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return path
+
+        render = self._renders.get(path)
+        if render is None:
+            render = asyncio.create_task(self._render(spec, image, path))
+            self._renders[path] = render
+            render.add_done_callback(lambda _: self._renders.pop(path, None))
+        # Shielded so one client disconnecting doesn't cancel the others' render
+        return await asyncio.shield(render)
+
+    async def _render(self, spec: DerivativeSpec, image: ProductImage, path: str) -> str:
+        if os.path.exists(path):
+            # Rendered by another worker
+            size = os.path.getsize(path)
+        else:
+            if not os.path.exists(image.image_path):
+                raise LookupError(spec.image_id)
+            try:
+                size = await image_pipeline.run(
+                    render_derivative, image.image_path, path,
+                    spec.width, spec.height, spec.fit, spec.image_format
+                )
+            except OSError as e:
+                # Includes PIL's UnidentifiedImageError
+                self.failed_renders += 1
+                self._failures.set(path, str(e) or type(e).__name__)
+                raise UnrenderableImage(spec.image_id) from e
+            self.renders += 1
+        self._add(path, size)
+        await self._evict()
+        return path
+
+    async def _discard(self, image_id: UUID):
+        """Drop a deleted image's derivatives, including ones other workers rendered"""
+        directory = os.path.join(self.directory, str(image_id))
+        for path in [path for path in self._entries if os.path.dirname(path) == directory]:
+            self._total_bytes -= self._entries.pop(path)
+        if os.path.isdir(directory):
+            await run_in_threadpool(shutil.rmtree, directory, True)
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "renders": self.renders,
+            "failed_renders": self.failed_renders,
+            "remembered_failures": len(self._failures),
+            "evictions": self.evictions,
+            "in_flight": len(self._renders)
+        }
+
+derivative_cache = DerivativeCache(
+    settings.derivative_cache_directory,
+    settings.derivative_cache_max_bytes,
+    settings.derivative_failure_ttl_seconds
+)
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Set
+from uuid import UUID
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.product import ImageStatus, ProductImage
+from app.services.product_service import AsyncProductService
+from app.utils.image_processing import create_image_variants
+
+logger = logging.getLogger(__name__)
+
+class ImagePipeline:
+    """Renders image variants in a process pool, off the event loop.
+
+    The upload endpoint stores the original and a ProductImage row in the
+    processing state, then submits it here if its blob is new (images of
+    a blob already stored share its variants). The row is the durable
+    job: anything still processing when a worker stops is resubmitted by
+    start() on the next boot, since the original is already on disk.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and a DB pool is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, image: ProductImage):
+        # <blob or legacy product dir>/original/<filename>
+        product_dir = os.path.dirname(os.path.dirname(image.image_path))
+        task = asyncio.create_task(self._process(
+            image.id, image.blob_sha256, image.image_path, product_dir, image.image_name
+        ))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(self, fn, *args):
+        """Run a picklable CPU-bound function in the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    async def _process(self, image_id: UUID, blob_sha256: Optional[str], original_path: str, product_dir: str, filename: str):
+        try:
+            variants = await self.run(create_image_variants, original_path, product_dir, filename)
+            status = ImageStatus.ready
+        except Exception:
+            logger.exception("Image processing failed for %s", image_id)
+            variants, status = None, ImageStatus.failed
+        async with AsyncSessionLocal() as db:
+            await AsyncProductService.set_image_variants(db, image_id, status, variants, blob_sha256)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._tasks)
+
+    async def start(self):
+        """Resubmit images left in processing by a previous run"""
+        async with AsyncSessionLocal() as db:
+            images = await AsyncProductService.get_processing_images(db)
+        # Images sharing a blob are rendered once
+        jobs = {image.blob_sha256 or image.id: image for image in images}
+        for image in jobs.values():
+            self.submit(image)
+        if jobs:
+            logger.info("Resubmitted %d unfinished image jobs", len(jobs))
+
+    async def stop(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+image_pipeline = ImagePipeline(settings.image_workers)
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+from typing import Callable, Dict, Iterable, Optional, Set
+from uuid import UUID
+import asyncpg
+from fastapi import WebSocket
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from app.config import settings
+from app.database import async_engine
+
+logger = logging.getLogger(__name__)
+
+class Subscriber:
+    """One WebSocket connection and its outgoing queue.
+
+    Events are queued rather than sent inline so one slow client can't
+    stall delivery to everyone else. A client that falls a full queue
+    behind is disconnected and is expected to catch up over HTTP.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: UUID, queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task = asyncio.create_task(self._send())
+
+    def put(self, event: str) -> bool:
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _send(self):
+        try:
+            while True:
+                event = await self._queue.get()
+                await self.websocket.send_text(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The receive loop notices the disconnect and unsubscribes
+            pass
+
+    async def close(self, code: int = 1000):
+        self._task.cancel()
+        try:
+            await self.websocket.close(code)
+        except Exception:
+            pass
+
+class MemoryBackend:
+    """Delivers straight to this process. Only correct with one worker."""
+
+    max_payload: Optional[int] = None
+
+    async def start(self, deliver: Callable[[str], None]):
+        self._deliver = deliver
+
+    async def publish(self, payload: str):
+        self._deliver(payload)
+
+    async def stop(self):
+        pass
+
+class PostgresBackend:
+    """Fans events out to every worker through LISTEN/NOTIFY.
+
+    Each worker holds one dedicated asyncpg connection that LISTENs on the
+    channel and reconnects if it drops; events sent while it is down are
+    lost, as NOTIFY is not durable. Publishing uses the async pool.
+    """
+
+    # NOTIFY payloads must be shorter than 8000 bytes
+    max_payload = 7900
+
+    def __init__(self, dsn: str, channel: str):
+        self.dsn = dsn
+        self.channel = channel
+        self._connection: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Callable[[str], None]):
+        self._deliver = deliver
+        self._task = asyncio.create_task(self._listen())
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._deliver(payload)
+
+    async def _listen(self):
+        delay = 1
+        while True:
+            lost = asyncio.Event()
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                self._connection.add_termination_listener(lambda connection: lost.set())
+                await self._connection.add_listener(self.channel, self._on_notify)
+                delay = 1
+                await lost.wait()
+                logger.warning("Realtime LISTEN connection closed, reconnecting")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.exception("Realtime LISTEN connection failed, retrying in %ds", delay)
+            self._connection = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    async def publish(self, payload: str):
+        async with async_engine.connect() as connection:
+            await connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": payload}
+            )
+            await connection.commit()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+class MessageHub:
+    """Pushes conversation events to the participants' open WebSockets.
+
+    publish() hands an envelope of recipients + event to the backend, which
+    calls deliver() in every worker; deliver() queues the event on the
+    local subscribers of each recipient.
+    """
+
+    def __init__(self, backend, queue_size: int):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers: Dict[UUID, Set[Subscriber]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped_subscribers = 0
+
+    async def start(self):
+        await self.backend.start(self.deliver)
+
+    async def stop(self):
+        for subscribers in list(self._subscribers.values()):
+            for subscriber in list(subscribers):
+                await subscriber.close(1001)
+        self._subscribers.clear()
+        await self.backend.stop()
+
+    def subscribe(self, websocket: WebSocket, user_id: UUID) -> Subscriber:
+        subscriber = Subscriber(websocket, user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    async def unsubscribe(self, subscriber: Subscriber, code: int = 1000):
+        subscribers = self._subscribers.get(subscriber.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.user_id]
+        await subscriber.close(code)
+
+    async def publish(self, recipients: Iterable[UUID], event: dict):
+        to = sorted({str(user_id) for user_id in recipients})
+        payload = json.dumps({"to": to, "event": event})
+        if self.backend.max_payload and len(payload.encode()) > self.backend.max_payload:
+            # Too big to relay; clients fetch the details over HTTP
+            event = {"type": event["type"], "conversation_id": event["conversation_id"], "truncated": True}
+            payload = json.dumps({"to": to, "event": event})
+        try:
+            await self.backend.publish(payload)
+            self.published += 1
+        except Exception:
+            # Realtime delivery is best effort; the data is already stored
+            logger.exception("Failed to publish %s event", event["type"])
+
+    def deliver(self, payload: str):
+        envelope = json.loads(payload)
+        event = json.dumps(envelope["event"])
+        for user_id in envelope["to"]:
+            for subscriber in list(self._subscribers.get(UUID(user_id), ())):
+                if subscriber.put(event):
+                    self.delivered += 1
+                else:
+                    self.dropped_subscribers += 1
+                    # 1013: try again later
+                    asyncio.create_task(self.unsubscribe(subscriber, 1013))
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "connected_users": len(self._subscribers),
+            "connections": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped_subscribers
+        }
+
+def _create_backend():
+    if settings.realtime_backend == "postgres":
+        dsn = make_url(settings.database_url).set(drivername="postgresql")
+        return PostgresBackend(dsn.render_as_string(hide_password=False), settings.realtime_channel)
+    if settings.realtime_backend == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown realtime_backend: {settings.realtime_backend}")
+
+message_hub = MessageHub(_create_backend(), settings.realtime_queue_size)
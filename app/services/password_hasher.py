@@ -0,0 +1,93 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from app.config import settings
+from app.utils.security import pwd_context
+
+class HasherSaturated(Exception):
+    pass
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop, in a thread pool of its own.
+
+    Each hash takes ~250ms of CPU at the default cost (bcrypt releases the
+    GIL meanwhile), so a burst of logins run inline would stall every
+    other request. At most `workers` hashes run at once and `max_queue`
+    more may wait; past that, calls fail fast with HasherSaturated (503)
+    instead of queueing logins behind each other until they time out.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0  # Running + queued; only touched on the event loop
+        self.rejected = 0
+        self.rehashed = 0
+        # operation -> [count, hash seconds, max hash seconds, queue wait seconds]
+        self._timings = {"hash": [0, 0.0, 0.0, 0.0], "verify": [0, 0.0, 0.0, 0.0]}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _run(self, operation: str, fn, *args):
+        if self._in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HasherSaturated()
+        self._in_flight += 1
+        try:
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            result, seconds = await loop.run_in_executor(self._get_executor(), _timed, fn, *args)
+        finally:
+            self._in_flight -= 1
+        timing = self._timings[operation]
+        timing[0] += 1
+        timing[1] += seconds
+        timing[2] = max(timing[2], seconds)
+        timing[3] += time.perf_counter() - started - seconds
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", pwd_context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """Check a password; the second item is a new hash to store when the
+        stored one doesn't use the configured scheme or cost"""
+        valid, new_hash = await self._run("verify", pwd_context.verify_and_update, password, password_hash)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    async def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            **{
+                operation: {
+                    "count": count,
+                    "mean_ms": round(total / count * 1000, 1) if count else None,
+                    "max_ms": round(slowest * 1000, 1),
+                    "mean_queue_ms": round(waited / count * 1000, 1) if count else None
+                }
+                for operation, (count, total, slowest, waited) in self._timings.items()
+            }
+        }
+
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_max_queue)
@@ -0,0 +1,44 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from app.config import settings
+from app.models.user import User, UserType
+from app.utils.cache import TTLCache
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of the authenticated user's row.
+
+    Carries every field of the User response schema but no session, so it
+    can be cached across requests. Write paths must load the ORM object.
+    """
+    id: UUID
+    email: str
+    phone: str
+    company_name: str
+    contact_person: str
+    gst_number: str
+    business_license: Optional[str]
+    address: Optional[str]
+    city: Optional[str]
+    state: Optional[str]
+    pincode: Optional[str]
+    user_type: UserType
+    is_verified: bool
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(**{field.name: getattr(user, field.name) for field in fields(cls)})
+
+# user id -> Principal. Per worker; other workers see changes after the TTL.
+principal_cache = TTLCache(settings.principal_cache_size, settings.principal_cache_ttl_seconds)
+
+# access token -> user id, kept no longer than the token's own exp
+token_cache = TTLCache(settings.principal_cache_size, settings.access_token_expire_minutes * 60)
+
+def invalidate_principal(user_id: UUID):
+    principal_cache.pop(user_id)
@@ -0,0 +1,149 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import delete, func, literal, null, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.product import CachedProductDetail, Product
+from app.schemas.product import Product as ProductSchema
+from app.utils.cache import TTLCache
+
+class ProductDetailCache:
+    """Serialized GET /products/{id} responses.
+
+    Bodies live in a per-worker TTLCache and, with shared=True, also in the
+    product_detail_cache table, which every worker reads through on a
+    local miss: a primary-key lookup of ready bytes instead of loading the
+    product and its images and serializing them. Writes evict from both
+    tiers once they commit, so other workers see a change once their
+    short-lived local copy expires.
+
+    A fill can race a write: the product is loaded, a write commits and
+    evicts it, then the fill stores what was loaded. So fills are
+    versioned, like ResponseCache generations: evict() bumps the shared
+    row's version (leaving a bodiless row behind if need be) and this
+    worker's eviction count, and put() only stores a body if neither
+    moved since before the product was loaded (see fill_token()).
+    """
+
+    def __init__(self, size: int, ttl: float, shared: bool, local_ttl: float):
+        self.ttl = ttl
+        self.shared = shared
+        self.local = TTLCache(size, local_ttl if shared else ttl)
+        self._evictions = 0
+        self._lock = threading.Lock()
+        self.shared_hits = 0
+        self.stale_fills = 0
+
+    @staticmethod
+    def serialize(product: Product) -> bytes:
+        return ProductSchema.model_validate(product).model_dump_json().encode()
+
+    def get_local(self, product_id: UUID) -> Optional[bytes]:
+        return self.local.get(product_id)
+
+    def fill_token(self) -> int:
+        """Take before reading anything to fill the cache with"""
+        return self._evictions
+
+    def _set_local(self, product_id: UUID, body: bytes, token: int) -> bool:
+        with self._lock:
+            if self._evictions != token:
+                return False
+            self.local.set(product_id, body)
+            return True
+
+    def get_shared(self, db: Session, product_id: UUID, token: int) -> Tuple[Optional[bytes], Optional[int]]:
+        """The shared tier's body for a product (None on a miss) and the
+        row's version (None if there is no row), to pass to put()"""
+        if not self.shared:
+            return None, None
+        row = db.execute(select(
+            CachedProductDetail.body,
+            CachedProductDetail.version,
+            CachedProductDetail.cached_at > datetime.utcnow() - timedelta(seconds=self.ttl)
+        ).where(CachedProductDetail.product_id == product_id)).first()
+        if row is None:
+            return None, None
+        body, version, fresh = row
+        if body is None or not fresh:
+            return None, version
+        self.shared_hits += 1
+        self._set_local(product_id, body, token)
+        return body, version
+
+    def put(self, db: Session, product: Product, token: int, version: Optional[int]) -> bytes:
+        """Store the body of a product loaded after fill_token() returned
+        `token` and get_shared() returned `version`, unless it was evicted
+        since"""
+        body = self.serialize(product)
+        if self.shared:
+            if version is None:
+                statement = insert(CachedProductDetail).values(
+                    product_id=product.id, body=body, cached_at=datetime.utcnow()
+                ).on_conflict_do_nothing()
+            else:
+                statement = update(CachedProductDetail).where(
+                    CachedProductDetail.product_id == product.id,
+                    CachedProductDetail.version == version
+                ).values(body=body, cached_at=datetime.utcnow())
+            try:
+                stored = db.execute(statement).rowcount == 1
+                db.commit()
+            except IntegrityError:
+                # Deleted meanwhile
+                db.rollback()
+                return body
+            if not stored:
+                self.stale_fills += 1
+                return body
+        if not self._set_local(product.id, body, token):
+            self.stale_fills += 1
+        return body
+
+    def evict(self, db: Session, product_ids: Iterable[UUID]):
+        """Drop entries after the change to them has committed"""
+        product_ids = list(product_ids)
+        if self.shared and product_ids:
+            # Rows are kept, bodiless, so a fill that started before this
+            # finds the version moved even if there was no row to evict
+            statement = insert(CachedProductDetail).from_select(
+                ["product_id", "body", "cached_at", "version"],
+                select(Product.id, null(), func.now(), literal(1)).where(Product.id.in_(product_ids))
+            )
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[CachedProductDetail.product_id],
+                set_={"body": None, "version": CachedProductDetail.version + 1}
+            ))
+            db.commit()
+        with self._lock:
+            self._evictions += 1
+            for product_id in product_ids:
+                self.local.pop(product_id)
+
+    def clear(self, db: Session):
+        """Drop every entry, in both tiers"""
+        if self.shared:
+            db.execute(delete(CachedProductDetail))
+            db.commit()
+        with self._lock:
+            self._evictions += 1
+            self.local.clear()
+
+    def stats(self) -> dict:
+        return {
+            "shared": self.shared,
+            "shared_hits": self.shared_hits,
+            "stale_fills": self.stale_fills,
+            "local": self.local.stats()
+        }
+
+product_cache = ProductDetailCache(
+    settings.product_cache_size,
+    settings.product_cache_ttl_seconds,
+    settings.product_cache_shared,
+    settings.product_cache_local_ttl_seconds
+)
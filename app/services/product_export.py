@@ -0,0 +1,150 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Optional
+from uuid import UUID
+from sqlalchemy import select
+from starlette.responses import StreamingResponse
+from app.config import settings
+from app.database import export_engine
+from app.models.product import Product
+from app.services.product_service import MatchMode, search_conditions
+
+EXPORT_COLUMNS = [
+    Product.id,
+    Product.seller_id,
+    Product.title,
+    Product.description,
+    Product.category_id,
+    Product.material_id,
+    Product.quantity,
+    Product.unit,
+    Product.price,
+    Product.price_negotiable,
+    Product.condition,
+    Product.manufacturing_date,
+    Product.location_city,
+    Product.location_state,
+    Product.pincode,
+    Product.specifications,
+    Product.status,
+    Product.views_count,
+    Product.created_at,
+    Product.updated_at,
+]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+class ExportSlots:
+    """At most `limit` exports stream at once, one per export_engine
+    connection. Taking a slot never waits: the endpoint turns away requests
+    beyond the limit instead of queueing them."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+
+    def try_acquire(self) -> Optional["ExportSlot"]:
+        # No await between the check and the increment
+        if self.active >= self.limit:
+            return None
+        self.active += 1
+        return ExportSlot(self)
+
+class ExportSlot:
+    def __init__(self, slots: ExportSlots):
+        self._slots = slots
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._slots.active -= 1
+
+export_slots = ExportSlots(settings.export_max_concurrent)
+
+class ExportResponse(StreamingResponse):
+    """Releases the export's slot once the response is over, including when
+    it ends before the body was ever iterated (client gone, send failed)"""
+
+    def __init__(self, content, slot: ExportSlot, **kwargs):
+        super().__init__(content, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release()
+
+def _plain(value):
+    """Column value -> JSON/CSV scalar. Decimals stay exact as strings."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+async def stream_products(
+    slot: ExportSlot,
+    export_format: str,
+    query: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+    material_id: Optional[UUID] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    condition: Optional[str] = None,
+    match: MatchMode = "contains"
+) -> AsyncIterator[bytes]:
+    """Encode every product matching the search_products filters.
+
+    Rows come from a server-side cursor, export_batch_size at a time, as
+    plain tuples (no ORM objects or pydantic models), and each batch is
+    encoded into a single chunk. The next batch is only fetched once the
+    response has sent the previous one, so a slow client holds back the
+    cursor instead of filling memory. The caller takes `slot` from
+    export_slots, and it is released when the stream ends. Exports stream
+    over export_engine, whose statement and idle-in-transaction timeouts
+    end exports that run or stall too long.
+    """
+    names = [column.key for column in EXPORT_COLUMNS]
+    statement = select(*EXPORT_COLUMNS).where(*search_conditions(
+        query, category_id, material_id, city, state, min_price, max_price, condition, match
+    )).order_by(Product.id).execution_options(yield_per=settings.export_batch_size)
+
+    try:
+        async with export_engine.connect() as connection:
+            result = await connection.stream(statement)
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(names)
+            async for rows in result.partitions():
+                if export_format == "csv":
+                    for row in rows:
+                        writer.writerow([
+                            json.dumps(value) if isinstance(value, dict) else _plain(value) for value in row
+                        ])
+                    chunk = buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    chunk = "".join(
+                        json.dumps(dict(zip(names, row)), default=_plain) + "\n" for row in rows
+                    )
+                yield chunk.encode()
+            if export_format == "csv" and buffer.tell():
+                # Header of an empty export
+                yield buffer.getvalue().encode()
+    finally:
+        slot.release()
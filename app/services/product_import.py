@@ -0,0 +1,341 @@
+import asyncio
+import csv
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import func, update
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.category import Category, Material
+from app.models.import_job import ImportJob, ImportJobStatus
+from app.models.product import Product
+from app.schemas.product import ProductCreate
+from app.services.product_service import listing_cache
+
+logger = logging.getLogger(__name__)
+
+# Request Content-Type -> import format
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/json-lines": "jsonl",
+}
+
+class ImportTooLarge(Exception):
+    pass
+
+class ImportInterrupted(Exception):
+    pass
+
+class ImportQueueFull(Exception):
+    pass
+
+ACTIVE_STATUSES = (ImportJobStatus.queued, ImportJobStatus.running)
+
+def _read_rows(path: str, import_format: str) -> Iterator[Tuple[int, object]]:
+    """Yield (line number, raw row) one at a time, never the whole file"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if import_format == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_number, line
+
+def _parse_row(raw, import_format: str, category_ids: Set[UUID], material_ids: Set[UUID]) -> ProductCreate:
+    if import_format == "csv":
+        # Empty cells fall back to the schema defaults
+        data = {key: value for key, value in raw.items() if key and value not in (None, "")}
+        if "specifications" in data:
+            try:
+                data["specifications"] = json.loads(data["specifications"])
+            except ValueError:
+                raise ValueError("specifications: must be a JSON object")
+    else:
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            raise ValueError("Invalid JSON")
+        if not isinstance(data, dict):
+            raise ValueError("Each line must be a JSON object")
+
+    try:
+        product = ProductCreate.model_validate(data)
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+        ))
+
+    # Checked here so one bad reference doesn't fail the whole batch insert
+    if product.category_id not in category_ids:
+        raise ValueError("category_id: unknown category")
+    if product.material_id and product.material_id not in material_ids:
+        raise ValueError("material_id: unknown material")
+    return product
+
+class ProductImporter:
+    """Bulk product import from CSV or JSON Lines.
+
+    The request body is streamed to a spool file and an ImportJob row is
+    returned straight away; a worker thread then reads the file a row at a
+    time, validates each against ProductCreate and inserts valid rows in
+    batches of import_batch_size (one multi-row INSERT per flush). Job
+    progress is committed every batch_size rows, so GET /products/import/{id}
+    reports it from any worker. Memory use is bounded by one batch.
+
+    At most `workers` imports run at once per process and `max_queue` more
+    may wait; past that, reserve() fails with ImportQueueFull (429) before
+    anything is spooled. While a job is queued or running, its worker
+    refreshes heartbeat_at; any worker fails jobs whose heartbeat is older
+    than stale_after, which is what is left behind by a worker that died.
+    """
+
+    def __init__(self, batch_size: int, max_errors: int, workers: int, max_queue: int,
+                 heartbeat_interval: float, stale_after: float):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.workers = workers
+        self.max_queue = max_queue
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._jobs: Set[UUID] = set()  # Queued or running here
+        self._in_flight = 0  # Reserved + submitted; only touched on the event loop
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._stopping = threading.Event()
+        self.rejected = 0
+        self.recovered = 0
+
+    @staticmethod
+    def spool_path(job_id: UUID, import_format: str) -> str:
+        return os.path.join(settings.import_directory, f"{job_id}.{import_format}")
+
+    async def spool(self, chunks: AsyncIterator[bytes], path: str, max_size: int):
+        """Write the request body to disk, raising ImportTooLarge past max_size"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = 0
+        f = await run_in_threadpool(open, path, "wb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise ImportTooLarge()
+                await run_in_threadpool(f.write, chunk)
+        except BaseException:
+            f.close()
+            os.remove(path)
+            raise
+        f.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="product-import")
+        return self._executor
+
+    def reserve(self):
+        """Claim a place for one import, to be passed on by submit() or
+        given back by release()"""
+        if self._in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise ImportQueueFull()
+        self._in_flight += 1
+
+    def release(self):
+        self._in_flight -= 1
+
+    def submit(self, job: ImportJob):
+        """Queue a job on the place taken by reserve()"""
+        path = self.spool_path(job.id, job.format)
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(
+            loop.run_in_executor(self._get_executor(), self._run, job.id, path, job.format, job.seller_id)
+        )
+        self._tasks.add(task)
+        self._jobs.add(job.id)
+
+        def done(task: asyncio.Task, job_id: UUID = job.id):
+            self._tasks.discard(task)
+            self._jobs.discard(job_id)
+            self.release()
+        task.add_done_callback(done)
+
+    def _run(self, job_id: UUID, path: str, import_format: str, seller_id: UUID):
+        db = SessionLocal()
+        # Kept outside the job row so a rolled back batch can't lose it
+        progress = {"processed_rows": 0, "imported_rows": 0, "failed_rows": 0, "errors": []}
+        try:
+            job = db.get(ImportJob, job_id)
+            job.status = ImportJobStatus.running
+            job.started_at = job.heartbeat_at = datetime.utcnow()
+            db.commit()
+
+            category_ids = {category_id for (category_id,) in db.query(Category.id)}
+            material_ids = {material_id for (material_id,) in db.query(Material.id)}
+
+            batch: List[Tuple[int, ProductCreate]] = []
+            for line_number, raw in _read_rows(path, import_format):
+                if self._stopping.is_set():
+                    raise ImportInterrupted("Interrupted by server shutdown")
+                progress["processed_rows"] += 1
+                try:
+                    batch.append((line_number, _parse_row(raw, import_format, category_ids, material_ids)))
+                except ValueError as e:
+                    self._record_error(progress, line_number, str(e))
+                if progress["processed_rows"] % self.batch_size == 0:
+                    self._insert_batch(db, job, progress, batch, seller_id)
+                    batch = []
+            self._insert_batch(db, job, progress, batch, seller_id)
+
+            job.status = ImportJobStatus.completed
+            job.finished_at = datetime.utcnow()
+            self._commit(db, job, progress)
+        except Exception as e:
+            logger.exception("Product import %s failed", job_id)
+            db.rollback()
+            job = db.get(ImportJob, job_id)
+            if job:
+                job.status = ImportJobStatus.failed
+                job.error = str(e) or type(e).__name__
+                job.finished_at = datetime.utcnow()
+                db.commit()
+        finally:
+            db.close()
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _record_error(self, progress: dict, line_number: int, error: str):
+        progress["failed_rows"] += 1
+        if len(progress["errors"]) < self.max_errors:
+            progress["errors"].append({"line": line_number, "error": error})
+
+    @staticmethod
+    def _commit(db: Session, job: ImportJob, progress: dict):
+        for key, value in progress.items():
+            # A new list so the JSONB change is detected
+            setattr(job, key, list(value) if key == "errors" else value)
+        db.commit()
+
+    def _insert_batch(self, db: Session, job: ImportJob, progress: dict, batch: List[Tuple[int, ProductCreate]], seller_id: UUID):
+        """Insert a batch and commit it with the job's progress. If the
+        database rejects the batch, retry it row by row in savepoints to
+        report the rows at fault."""
+        products = [Product(seller_id=seller_id, **item.model_dump()) for _, item in batch]
+        try:
+            db.add_all(products)
+            db.flush()
+            progress["imported_rows"] += len(products)
+        except (IntegrityError, DataError):
+            db.rollback()
+            products = []
+            for line_number, item in batch:
+                product = Product(seller_id=seller_id, **item.model_dump())
+                try:
+                    with db.begin_nested():
+                        db.add(product)
+                    products.append(product)
+                    progress["imported_rows"] += 1
+                except (IntegrityError, DataError) as e:
+                    self._record_error(progress, line_number, str(e.orig).splitlines()[0])
+        self._commit(db, job, progress)
+        if products:
+            listing_cache.invalidate()
+        # Keep the identity map to one batch
+        for product in products:
+            db.expunge(product)
+
+    @staticmethod
+    def _touch(job_ids: List[UUID]):
+        with SessionLocal() as db:
+            db.execute(
+                update(ImportJob)
+                .where(ImportJob.id.in_(job_ids), ImportJob.status.in_(ACTIVE_STATUSES))
+                .values(heartbeat_at=datetime.utcnow())
+            )
+            db.commit()
+
+    def recover(self) -> int:
+        """Fail the queued or running jobs no worker has touched for
+        stale_after seconds, and remove their spool files"""
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            jobs = db.query(ImportJob).filter(
+                ImportJob.status.in_(ACTIVE_STATUSES),
+                func.coalesce(ImportJob.heartbeat_at, ImportJob.created_at) < now - timedelta(seconds=self.stale_after)
+            ).with_for_update(skip_locked=True).all()
+            for job in jobs:
+                job.status = ImportJobStatus.failed
+                job.error = "Interrupted: the server processing it stopped"
+                job.finished_at = now
+            db.commit()
+            paths = [self.spool_path(job.id, job.format) for job in jobs]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        if paths:
+            logger.warning("Failed %d orphaned product import(s)", len(paths))
+        self.recovered += len(paths)
+        return len(paths)
+
+    async def _heartbeat(self):
+        while True:
+            try:
+                if self._jobs:
+                    await run_in_threadpool(self._touch, list(self._jobs))
+                await run_in_threadpool(self.recover)
+            except Exception:
+                logger.exception("Product import heartbeat failed")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def start(self):
+        if self._heartbeat_task is None:
+            self._stopping.clear()
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self):
+        # Running imports stop at the next row and queued ones as they
+        # start; either way the job is marked failed
+        self._stopping.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "jobs": len(self._jobs),
+            "rejected": self.rejected,
+            "recovered": self.recovered
+        }
+
+product_importer = ProductImporter(
+    settings.import_batch_size,
+    settings.import_max_errors,
+    settings.import_workers,
+    settings.import_max_queue,
+    settings.import_heartbeat_seconds,
+    settings.import_stale_after_seconds
+)
@@ -1,11 +1,155 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc
-from app.models.product import Product, ProductImage
+from sqlalchemy.orm import Session, joinedload, with_expression
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, desc, asc, select, update, delete, func, tuple_, text, literal_column, REAL
+from sqlalchemy.dialects.postgresql import insert
+from app.models.product import Product, ProductImage, ImageBlob, ImageStatus, SEARCH_CONFIG
 from app.models.category import Category, Material
 from app.models.user import User
+from app.models.import_job import ImportJob
 from app.schemas.product import ProductCreate, ProductUpdate
-from typing import Optional, List, Dict, Any
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.cache import ResponseCache, TTLCache
+from app.services.product_cache import product_cache
+from app.utils.image_processing import remove_directory, restore_directory, set_aside_directory, store_original
+from app.config import settings
+from typing import Optional, List, Dict, Any, Literal, Set, Tuple
 from uuid import UUID
+import enum
+import os
+import shutil
+
+SNIPPET_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=10, MaxFragments=2"
+
+TITLE_SUGGESTION_THRESHOLD = 0.4
+
+# Increments are relative to the stored value, so concurrent flushes from
+# several workers never lose views. updated_at is deliberately left alone.
+ADD_VIEWS_SQL = text("""
+    UPDATE products SET views_count = products.views_count + d.delta
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:deltas AS integer[])) AS d(id, delta)
+    WHERE products.id = d.id
+""")
+
+# sort_by values accepted by search_products, in addition to "relevance".
+# Each has a matching (column, id) partial index on active products.
+SORT_COLUMNS = {
+    "created_at": Product.created_at,
+    "updated_at": Product.updated_at,
+    "price": Product.price,
+    "views_count": Product.views_count,
+    "title": Product.title,
+}
+
+# facets= names accepted by GET /products/facets and the column each one counts
+FACET_COLUMNS = {
+    "category": Product.category_id,
+    "material": Product.material_id,
+    "condition": Product.condition,
+    "state": Product.location_state,
+}
+
+# Normalized filter set -> facet counts, so paging doesn't recount
+facet_cache = TTLCache(settings.facet_cache_size, settings.facet_cache_ttl_seconds)
+
+# Serialized GET /products/ pages. Invalidated by the writes below once they
+# commit; other workers' copies expire after listing_cache_ttl_seconds.
+listing_cache = ResponseCache(settings.listing_cache_max_bytes, settings.listing_cache_ttl_seconds)
+
+def parse_facets(facets: Optional[str]) -> List[str]:
+    names = sorted({name.strip() for name in (facets or "").split(",") if name.strip()})
+    unknown = [name for name in names if name not in FACET_COLUMNS]
+    if unknown:
+        raise ValueError(f"Invalid facets: {', '.join(unknown)}")
+    return names
+
+def normalize_text(value: Optional[str]) -> Optional[str]:
+    # Every text filter is case-insensitive
+    return " ".join(value.split()).lower() if value and value.strip() else None
+
+def _resolve_sort(sort_by: str, sort_order: str, has_query: bool):
+    """Return the effective (sort_key, descending) pair for a listing"""
+    if sort_by == "relevance":
+        # Relevance is meaningless without a text query
+        return ("relevance", True) if has_query else ("created_at", True)
+    if sort_by not in SORT_COLUMNS:
+        raise ValueError(f"Invalid sort_by: {sort_by}")
+    return sort_by, sort_order == "desc"
+
+def _keyset_condition(column, descending: bool, value, last_id: UUID):
+    """Rows strictly after (value, last_id) in Postgres' default NULL placement
+    (NULLS LAST ascending, NULLS FIRST descending)."""
+    if descending:
+        if value is None:
+            return or_(and_(column.is_(None), Product.id < last_id), column.isnot(None))
+        return tuple_(column, Product.id) < tuple_(value, last_id)
+    if value is None:
+        return and_(column.is_(None), Product.id > last_id)
+    return or_(tuple_(column, Product.id) > tuple_(value, last_id), column.is_(None))
+
+# How city/state filters compare: substring, or trigram similarity
+MatchMode = Literal["contains", "fuzzy"]
+
+def _location_match(column, value: str, match: MatchMode):
+    if match == "fuzzy":
+        # similarity(column, value) above pg_trgm.similarity_threshold (0.3)
+        return column.op("%")(value)
+    return column.ilike(f"%{value}%")
+
+def search_conditions(
+    query: Optional[str],
+    category_id: Optional[UUID],
+    material_id: Optional[UUID],
+    city: Optional[str],
+    state: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    condition: Optional[str],
+    match: MatchMode
+) -> list:
+    """WHERE clauses for a listing filter set, shared by search and facets"""
+    conditions = [Product.is_active == True]
+    
+    if query:
+        conditions.append(Product.search_vector.op("@@")(func.websearch_to_tsquery(SEARCH_CONFIG, query)))
+    
+    if category_id:
+        conditions.append(Product.category_id == category_id)
+    
+    if material_id:
+        conditions.append(Product.material_id == material_id)
+    
+    # Both modes are served by the trigram indexes on the location columns
+    if city:
+        conditions.append(_location_match(Product.location_city, city, match))
+    
+    if state:
+        conditions.append(_location_match(Product.location_state, state, match))
+    
+    if min_price:
+        conditions.append(Product.price >= min_price)
+    
+    if max_price:
+        conditions.append(Product.price <= max_price)
+    
+    if condition:
+        conditions.append(Product.condition == condition)
+    
+    return conditions
+
+def _ranked_values(db: Session, column, condition, score, limit: int) -> List[str]:
+    rows = db.query(column, score).filter(
+        Product.is_active == True,
+        condition
+    ).group_by(column).order_by(desc(score), column).limit(limit).all()
+    return [row[0] for row in rows]
+
+def _apply_keyset(query_filter, column, descending: bool, cursor: Optional[str], sort_key: str):
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_key, descending)
+        query_filter = query_filter.filter(_keyset_condition(column, descending, value, last_id))
+    if descending:
+        return query_filter.order_by(desc(column), desc(Product.id))
+    return query_filter.order_by(asc(column), asc(Product.id))
 
 class ProductService:
     @staticmethod
@@ -16,18 +160,29 @@ class ProductService:
         )
         db.add(db_product)
         db.commit()
+        listing_cache.invalidate()
         db.refresh(db_product)
         return db_product
 
     @staticmethod
     def get_product(db: Session, product_id: UUID) -> Optional[Product]:
+        # The Product response only nests images
         return db.query(Product).options(
-            joinedload(Product.images),
-            joinedload(Product.seller),
-            joinedload(Product.category),
-            joinedload(Product.material)
+            joinedload(Product.images)
         ).filter(Product.id == product_id).first()
 
+    @staticmethod
+    def get_product_detail(db: Session, product_id: UUID) -> Optional[bytes]:
+        """Serialized Product response, read through the shared cache tier"""
+        token = product_cache.fill_token()
+        body, version = product_cache.get_shared(db, product_id, token)
+        if body is None:
+            product = ProductService.get_product(db, product_id)
+            if product is None:
+                return None
+            body = product_cache.put(db, product, token, version)
+        return body
+
     @staticmethod
     def update_product(db: Session, product_id: UUID, product_update: ProductUpdate, user_id: UUID) -> Optional[Product]:
         product = db.query(Product).filter(
@@ -42,6 +197,8 @@ class ProductService:
             setattr(product, field, value)
         
         db.commit()
+        listing_cache.invalidate()
+        product_cache.evict(db, [product_id])
         db.refresh(product)
         return product
 
@@ -54,8 +211,20 @@ class ProductService:
         if not product:
             return False
         
+        blobs = {image.blob_sha256 for image in product.images if image.blob_sha256}
         db.delete(product)
-        db.commit()
+        db.flush()
+        released = ProductService.release_blobs(db, blobs)
+        try:
+            db.commit()
+        except Exception:
+            for aside in released:
+                restore_directory(aside)
+            raise
+        for aside in released:
+            remove_directory(aside)
+        listing_cache.invalidate()
+        product_cache.evict(db, [product_id])
         return True
 
     @staticmethod
@@ -72,59 +241,206 @@ class ProductService:
         sort_by: str = "created_at",
         sort_order: str = "desc",
         skip: int = 0,
-        limit: int = 20
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        match: MatchMode = "contains"
     ) -> List[Product]:
+        sort_key, descending = _resolve_sort(sort_by, sort_order, bool(query))
         
-        query_filter = db.query(Product).filter(Product.is_active == True)
+        query_filter = db.query(Product).filter(*search_conditions(
+            query, category_id, material_id, city, state, min_price, max_price, condition, match
+        ))
         
+        ts_query = None
         if query:
-            query_filter = query_filter.filter(
-                or_(
-                    Product.title.ilike(f"%{query}%"),
-                    Product.description.ilike(f"%{query}%")
+            ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+            query_filter = query_filter.options(
+                with_expression(
+                    Product.search_snippet,
+                    func.ts_headline(SEARCH_CONFIG, Product.description, ts_query, SNIPPET_OPTIONS)
                 )
             )
         
-        if category_id:
-            query_filter = query_filter.filter(Product.category_id == category_id)
-        
-        if material_id:
-            query_filter = query_filter.filter(Product.material_id == material_id)
-        
-        if city:
-            query_filter = query_filter.filter(Product.location_city.ilike(f"%{city}%"))
-        
-        if state:
-            query_filter = query_filter.filter(Product.location_state.ilike(f"%{state}%"))
-        
-        if min_price:
-            query_filter = query_filter.filter(Product.price >= min_price)
+        # Sorting - keyset on (sort key, id) when a cursor is given
+        if sort_key == "relevance":
+            sort_column = func.ts_rank(Product.search_vector, ts_query, type_=REAL)
+            query_filter = query_filter.options(with_expression(Product.search_rank, sort_column))
+        else:
+            sort_column = SORT_COLUMNS[sort_key]
+        query_filter = _apply_keyset(query_filter, sort_column, descending, cursor, sort_key)
+        if not cursor:
+            query_filter = query_filter.offset(skip)
         
-        if max_price:
-            query_filter = query_filter.filter(Product.price <= max_price)
+        return query_filter.options(
+            joinedload(Product.images)
+        ).limit(limit).all()
+
+    @staticmethod
+    def facet_counts(
+        db: Session,
+        facets: List[str],
+        query: Optional[str] = None,
+        category_id: Optional[UUID] = None,
+        material_id: Optional[UUID] = None,
+        city: Optional[str] = None,
+        state: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        condition: Optional[str] = None,
+        match: MatchMode = "contains"
+    ) -> Dict[str, Dict[str, int]]:
+        """Counts per value of each facet under the search_products filters,
+        in one scan grouped by GROUPING SETS ((facet_1), (facet_2), ...)"""
+        counts = {name: {} for name in facets}
+        if not facets:
+            return counts
         
-        if condition:
-            query_filter = query_filter.filter(Product.condition == condition)
+        columns = [FACET_COLUMNS[name] for name in facets]
+        rows = db.query(
+            *columns,
+            *[func.grouping(column) for column in columns],
+            func.count()
+        ).filter(*search_conditions(
+            query, category_id, material_id, city, state, min_price, max_price, condition, match
+        )).group_by(
+            func.grouping_sets(*columns)
+        ).order_by(desc(func.count())).all()
         
-        # Sorting
-        if sort_order == "desc":
-            order_by = desc(getattr(Product, sort_by))
-        else:
-            order_by = asc(getattr(Product, sort_by))
+        for row in rows:
+            # GROUPING(column) is 0 for the column the row's set groups by
+            index = list(row[len(columns):2 * len(columns)]).index(0)
+            value = row[index]
+            if value is not None:
+                key = value.value if isinstance(value, enum.Enum) else str(value)
+                counts[facets[index]][key] = row[-1]
+        return counts
+
+    @staticmethod
+    def get_seller_products(
+        db: Session,
+        seller_id: UUID,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> List[Product]:
+        query_filter = db.query(Product).filter(Product.seller_id == seller_id)
+        query_filter = _apply_keyset(query_filter, Product.created_at, True, cursor, "created_at")
+        if not cursor:
+            query_filter = query_filter.offset(skip)
         
         return query_filter.options(
             joinedload(Product.images)
-        ).order_by(order_by).offset(skip).limit(limit).all()
+        ).limit(limit).all()
+
+    @staticmethod
+    def suggest_terms(
+        db: Session,
+        query: Optional[str] = None,
+        city: Optional[str] = None,
+        state: Optional[str] = None,
+        limit: int = 5
+    ) -> Dict[str, List[str]]:
+        """Similar titles/cities/states for "did you mean", best match first"""
+        suggestions = {}
+        if query:
+            # Titles are long, so match the query against their best-matching
+            # words. The default 0.6 word threshold rejects most typos.
+            db.execute(select(func.set_config(
+                "pg_trgm.word_similarity_threshold", str(TITLE_SUGGESTION_THRESHOLD), True
+            )))
+            score = func.max(func.word_similarity(query, Product.title)).label("score")
+            suggestions["query"] = _ranked_values(db, Product.title, Product.title.op("%>")(query), score, limit)
+        
+        for key, column, value in (
+            ("city", Product.location_city, city),
+            ("state", Product.location_state, state),
+        ):
+            if value:
+                score = func.max(func.similarity(column, value)).label("score")
+                suggestions[key] = _ranked_values(db, column, column.op("%")(value), score, limit)
+        return suggestions
+
+    @staticmethod
+    def next_cursor(
+        products: List[Product],
+        limit: int,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        query: Optional[str] = None
+    ) -> Optional[str]:
+        """Cursor for the page after `products`, or None on the last page"""
+        if not products or len(products) < limit:
+            return None
+        sort_key, descending = _resolve_sort(sort_by, sort_order, bool(query))
+        last = products[-1]
+        value = last.search_rank if sort_key == "relevance" else getattr(last, sort_key)
+        return encode_cursor(sort_key, descending, value, last.id)
+
+    @staticmethod
+    def create_import_job(db: Session, job_id: UUID, seller_id: UUID, import_format: str) -> ImportJob:
+        job = ImportJob(id=job_id, seller_id=seller_id, format=import_format)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def get_import_job(db: Session, job_id: UUID, seller_id: UUID) -> Optional[ImportJob]:
+        return db.query(ImportJob).filter(
+            and_(ImportJob.id == job_id, ImportJob.seller_id == seller_id)
+        ).first()
 
     @staticmethod
     def increment_views(db: Session, product_id: UUID):
-        product = db.query(Product).filter(Product.id == product_id).first()
-        if product:
-            product.views_count += 1
-            db.commit()
+        ProductService.add_views(db, {product_id: 1})
 
     @staticmethod
-    def add_product_image(db: Session, product_id: UUID, image_data: dict) -> ProductImage:
+    def add_views(db: Session, deltas: Dict[UUID, int]) -> int:
+        """Apply buffered view increments in one set-based UPDATE.
+        Returns the number of products updated."""
+        if not deltas:
+            return 0
+        result = db.execute(ADD_VIEWS_SQL, {
+            "ids": list(deltas.keys()),
+            "deltas": list(deltas.values())
+        })
+        db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def add_product_image(db: Session, product_id: UUID, image_data: dict) -> Tuple[ProductImage, bool]:
+        """Attach a saved upload (see save_original_image) to a product.
+
+        Bytes that were uploaded before reuse the existing blob, its original
+        and its variants; the spooled copy is discarded. A blob whose render
+        failed is set back to processing, with the upload as its original.
+        Returns the image and whether the blob's variants need rendering.
+        """
+        statement = insert(ImageBlob).values(
+            sha256=image_data["sha256"],
+            original_path=image_data["original_path"],
+            file_size=image_data["file_size"],
+            mime_type=image_data.get("mime_type"),
+            status=ImageStatus.processing
+        )
+        # The no-op update locks an existing blob, so release_blobs can't
+        # remove it before this image references it
+        blob, created = db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ImageBlob.sha256],
+                set_={"sha256": statement.excluded.sha256}
+            ).returning(ImageBlob, literal_column("xmax = 0"))
+        ).one()
+        needs_render = created or blob.status == ImageStatus.failed
+        if needs_render:
+            # The blob row is locked, so only this upload retries the render.
+            # A retry keeps the blob's original_path, which may have another
+            # extension than this upload's.
+            blob.status = ImageStatus.processing
+            store_original(image_data["temp_path"], blob.original_path)
+        else:
+            os.remove(image_data["temp_path"])
+        
         # Set all other images as non-primary if this is primary
         if image_data.get("is_primary", False):
             db.query(ProductImage).filter(ProductImage.product_id == product_id).update(
@@ -133,13 +449,209 @@ class ProductService:
         
         db_image = ProductImage(
             product_id=product_id,
-            image_path=image_data["original_path"],
-            image_name=image_data["filename"],
+            blob_sha256=blob.sha256,
+            image_path=blob.original_path,
+            image_name=os.path.basename(blob.original_path),
             is_primary=image_data.get("is_primary", False),
-            file_size=image_data["file_size"],
-            mime_type=image_data.get("mime_type")
+            file_size=blob.file_size,
+            mime_type=blob.mime_type,
+            status=blob.status,
+            medium_path=blob.medium_path,
+            thumbnail_path=blob.thumbnail_path
         )
         db.add(db_image)
         db.commit()
+        listing_cache.invalidate()
+        product_cache.evict(db, [product_id])
         db.refresh(db_image)
-        return db_image
\ No newline at end of file
+        return db_image, needs_render
+
+    @staticmethod
+    def release_blobs(db: Session, blobs: Set[str]) -> List[str]:
+        """Delete those of the given blobs no image references any more.
+        Call after flushing the image deletes and before committing: the
+        deleted rows stay locked until then, so an upload of the same bytes
+        waits and stores a fresh copy.
+
+        Their directories are only set aside (see set_aside_directory), so
+        nothing is lost if the transaction rolls back. Returns the set-aside
+        paths: remove them once it commits, or restore them if it fails."""
+        if not blobs:
+            return []
+        result = db.execute(
+            delete(ImageBlob).where(
+                and_(ImageBlob.sha256.in_(blobs), ImageBlob.ref_count <= 0)
+            ).returning(ImageBlob.original_path)
+        )
+        released = []
+        for (original_path,) in result:
+            # <blob dir>/original/<filename>
+            aside = set_aside_directory(os.path.dirname(os.path.dirname(original_path)))
+            if aside:
+                released.append(aside)
+        return released
+
+    @staticmethod
+    def get_product_image(db: Session, product_id: UUID, image_id: UUID) -> Optional[ProductImage]:
+        return db.query(ProductImage).filter(
+            and_(ProductImage.id == image_id, ProductImage.product_id == product_id)
+        ).first()
+
+    @staticmethod
+    def get_image(db: Session, image_id: UUID) -> Optional[ProductImage]:
+        return db.get(ProductImage, image_id)
+
+    @staticmethod
+    def get_processing_images(db: Session) -> List[ProductImage]:
+        return db.query(ProductImage).filter(ProductImage.status == ImageStatus.processing).all()
+
+    @staticmethod
+    def set_image_variants(db: Session, image_id: UUID, status: ImageStatus, variants: Optional[dict] = None, blob_sha256: Optional[str] = None):
+        """Record the outcome on the image, or on the blob and every image sharing it"""
+        variants = variants or {}
+        values = {
+            "status": status,
+            "medium_path": variants.get("medium_path"),
+            "thumbnail_path": variants.get("thumbnail_path")
+        }
+        if blob_sha256:
+            # Blob first: its row lock makes an upload of the same bytes
+            # either see the result or insert its image before the update below
+            db.query(ImageBlob).filter(ImageBlob.sha256 == blob_sha256).update(values)
+            images = ProductImage.blob_sha256 == blob_sha256
+        else:
+            images = ProductImage.id == image_id
+        product_ids = db.scalars(
+            update(ProductImage).where(images).values(**values).returning(ProductImage.product_id)
+        ).all()
+        db.commit()
+        product_cache.evict(db, set(product_ids))
+
+class AsyncProductService:
+    """AsyncSession variants of ProductService.
+
+    Each method runs the sync implementation through AsyncSession.run_sync, so
+    the query logic lives in one place while the I/O goes through asyncpg
+    without blocking the event loop. Relationships needed by the response
+    schemas are loaded inside the greenlet, since lazy loads are not allowed
+    once the result is handed back to the route.
+    """
+
+    @staticmethod
+    async def create_product(db: AsyncSession, product_create: ProductCreate, seller_id: UUID) -> Product:
+        def _create(session: Session) -> Product:
+            product = ProductService.create_product(session, product_create, seller_id)
+            product.images
+            return product
+        return await db.run_sync(_create)
+
+    @staticmethod
+    async def get_product(db: AsyncSession, product_id: UUID) -> Optional[Product]:
+        return await db.run_sync(ProductService.get_product, product_id)
+
+    @staticmethod
+    async def get_product_detail(db: AsyncSession, product_id: UUID) -> Optional[bytes]:
+        body = product_cache.get_local(product_id)
+        if body is None:
+            body = await db.run_sync(ProductService.get_product_detail, product_id)
+        return body
+
+    @staticmethod
+    async def get_owned_product(db: AsyncSession, product_id: UUID, seller_id: UUID) -> Optional[Product]:
+        result = await db.execute(
+            select(Product).where(and_(Product.id == product_id, Product.seller_id == seller_id))
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    async def update_product(db: AsyncSession, product_id: UUID, product_update: ProductUpdate, user_id: UUID) -> Optional[Product]:
+        def _update(session: Session) -> Optional[Product]:
+            product = ProductService.update_product(session, product_id, product_update, user_id)
+            if product:
+                product.images
+            return product
+        return await db.run_sync(_update)
+
+    @staticmethod
+    async def delete_product(db: AsyncSession, product_id: UUID, user_id: UUID) -> bool:
+        return await db.run_sync(ProductService.delete_product, product_id, user_id)
+
+    @staticmethod
+    async def search_products(db: AsyncSession, *args, **kwargs) -> List[Product]:
+        return await db.run_sync(ProductService.search_products, *args, **kwargs)
+
+    @staticmethod
+    async def facet_counts(
+        db: AsyncSession,
+        facets: List[str],
+        query: Optional[str] = None,
+        category_id: Optional[UUID] = None,
+        material_id: Optional[UUID] = None,
+        city: Optional[str] = None,
+        state: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        condition: Optional[str] = None,
+        match: MatchMode = "contains"
+    ) -> Dict[str, Dict[str, int]]:
+        filters = {
+            "query": normalize_text(query),
+            "category_id": category_id,
+            "material_id": material_id,
+            "city": normalize_text(city),
+            "state": normalize_text(state),
+            "min_price": min_price,
+            "max_price": max_price,
+            "condition": condition,
+            "match": match,
+        }
+        key = (tuple(facets), tuple(filters.items()))
+        counts = facet_cache.get(key)
+        if counts is None:
+            counts = await db.run_sync(ProductService.facet_counts, facets, **filters)
+            facet_cache.set(key, counts)
+        return counts
+
+    @staticmethod
+    async def create_import_job(db: AsyncSession, job_id: UUID, seller_id: UUID, import_format: str) -> ImportJob:
+        return await db.run_sync(ProductService.create_import_job, job_id, seller_id, import_format)
+
+    @staticmethod
+    async def get_import_job(db: AsyncSession, job_id: UUID, seller_id: UUID) -> Optional[ImportJob]:
+        return await db.run_sync(ProductService.get_import_job, job_id, seller_id)
+
+    @staticmethod
+    async def suggest_terms(db: AsyncSession, *args, **kwargs) -> Dict[str, List[str]]:
+        return await db.run_sync(ProductService.suggest_terms, *args, **kwargs)
+
+    @staticmethod
+    async def get_seller_products(db: AsyncSession, *args, **kwargs) -> List[Product]:
+        return await db.run_sync(ProductService.get_seller_products, *args, **kwargs)
+
+    @staticmethod
+    async def increment_views(db: AsyncSession, product_id: UUID):
+        await db.run_sync(ProductService.increment_views, product_id)
+
+    @staticmethod
+    async def add_views(db: AsyncSession, deltas: Dict[UUID, int]) -> int:
+        return await db.run_sync(ProductService.add_views, deltas)
+
+    @staticmethod
+    async def add_product_image(db: AsyncSession, product_id: UUID, image_data: dict) -> Tuple[ProductImage, bool]:
+        return await db.run_sync(ProductService.add_product_image, product_id, image_data)
+
+    @staticmethod
+    async def get_product_image(db: AsyncSession, product_id: UUID, image_id: UUID) -> Optional[ProductImage]:
+        return await db.run_sync(ProductService.get_product_image, product_id, image_id)
+
+    @staticmethod
+    async def get_image(db: AsyncSession, image_id: UUID) -> Optional[ProductImage]:
+        return await db.run_sync(ProductService.get_image, image_id)
+
+    @staticmethod
+    async def get_processing_images(db: AsyncSession) -> List[ProductImage]:
+        return await db.run_sync(ProductService.get_processing_images)
+
+    @staticmethod
+    async def set_image_variants(db: AsyncSession, image_id: UUID, status: ImageStatus, variants: Optional[dict] = None, blob_sha256: Optional[str] = None):
+        await db.run_sync(ProductService.set_image_variants, image_id, status, variants, blob_sha256)
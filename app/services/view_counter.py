@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Dict, Optional
+from uuid import UUID
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.product_service import AsyncProductService
+
+logger = logging.getLogger(__name__)
+
+class ViewCounter:
+    """Write-behind buffer for product view counts.
+
+    Views are merged per product in memory and written back periodically
+    with one set-based UPDATE per batch, instead of a SELECT + UPDATE +
+    commit on every detail page view. Counts still pending when a worker
+    dies are lost, which is acceptable for a popularity signal.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.flushed_views = 0
+        self.flush_count = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0.0
+
+    def record(self, product_id: UUID, count: int = 1):
+        self._pending[product_id] += count
+        # Don't let a hot interval grow the buffer past one batch
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self, product_id: UUID) -> int:
+        return self._pending.get(product_id, 0)
+
+    async def flush(self) -> int:
+        """Write all pending increments, batch_size products per statement"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, Counter()
+            items = list(pending.items())
+            started = time.perf_counter()
+            flushed = 0
+            for i in range(0, len(items), self.batch_size):
+                batch: Dict[UUID, int] = dict(items[i:i + self.batch_size])
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await AsyncProductService.add_views(db, batch)
+                    flushed += sum(batch.values())
+                except Exception:
+                    # Put the batch back so the next flush retries it
+                    self.failed_flushes += 1
+                    self._pending.update(batch)
+                    logger.exception("Failed to flush %d product view counts", len(batch))
+            self.flush_count += 1
+            self.flushed_views += flushed
+            self.last_flush_seconds = time.perf_counter() - started
+            return flushed
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending_products": len(self._pending),
+            "pending_views": sum(self._pending.values()),
+            "flushed_views": self.flushed_views,
+            "flush_count": self.flush_count,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_seconds": round(self.last_flush_seconds, 4)
+        }
+
+view_counter = ViewCounter(settings.view_flush_interval_seconds, settings.view_flush_batch_size)
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+class TTLCache:
+    """Bounded LRU mapping whose entries also expire after a TTL.
+
+    Safe to share between the event loop and threadpool workers."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+class ResponseCache:
+    """Serialized responses (body bytes + headers) keyed by request, with a
+    TTL and an LRU bound on their total size.
+
+    invalidate() starts a new generation: stored entries are dropped and
+    anything computed from data read before the call is never stored under
+    the new one. Concurrent misses for the same key share one computation,
+    which runs in its own task so a client disconnecting doesn't cancel it
+    for the others.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (body, headers, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def invalidate(self):
+        # Called after commits, from the event loop or threadpool workers
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+            self._bytes = 0
+
+    def _get(self, key: Hashable) -> Optional[Tuple[bytes, dict]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            body, headers, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._bytes -= size
+                return None
+            self._data.move_to_end(key)
+            return body, headers
+
+    def _set(self, key: Hashable, body: bytes, headers: dict):
+        size = len(body) + sum(len(name) + len(value) for name, value in headers.items())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key[0] != self.generation:
+                # Invalidated while computing
+                return
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._data[key] = (body, headers, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_size, _) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+
+    async def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Awaitable[Tuple[bytes, dict]]]
+    ) -> Tuple[bytes, dict]:
+        key = (self.generation, key)
+        entry = self._get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        task = self._pending.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._compute(key, compute))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Tuple[bytes, dict]]]) -> Tuple[bytes, dict]:
+        body, headers = await compute()
+        self._set(key, body, headers)
+        return body, headers
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._pending)
+        }
@@ -1,39 +1,91 @@
+import hashlib
 import os
+import shutil
 import uuid
-from PIL import Image
+from PIL import Image, ImageOps
 from typing import Optional, Tuple
 from fastapi import UploadFile
 
 THUMBNAIL_SIZE = (200, 200)
 MEDIUM_SIZE = (800, 600)
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Derivative output format -> (PIL format, save options)
+DERIVATIVE_FORMATS = {
+    "jpeg": ("JPEG", {"optimize": True, "quality": 85}),
+    "png": ("PNG", {"optimize": True}),
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+}
+DERIVATIVE_FITS = ("contain", "cover")
 
 def create_directory(path: str):
     """Create directory if it doesn't exist"""
     os.makedirs(path, exist_ok=True)
 
-def process_product_image(file: UploadFile, product_id: str, upload_dir: str) -> dict:
-    """Process and save product image with multiple sizes"""
-    # Generate unique filename
+def blob_directory(upload_dir: str, sha256: str) -> str:
+    """<upload_dir>/blobs/<first two hex digits>/<sha256>"""
+    return os.path.join(upload_dir, "blobs", sha256[:2], sha256)
+
+def set_aside_directory(directory: str) -> Optional[str]:
+    """Rename a directory out of the way, so a new one can take its path
+    while the old one waits to be removed (or put back)"""
+    aside = f"{directory}.released-{uuid.uuid4().hex}"
+    try:
+        os.rename(directory, aside)
+    except FileNotFoundError:
+        return None
+    return aside
+
+def restore_directory(aside: str):
+    os.rename(aside, aside.rsplit(".released-", 1)[0])
+
+def remove_directory(aside: str):
+    shutil.rmtree(aside, ignore_errors=True)
+
+def save_original_image(file: UploadFile, upload_dir: str) -> dict:
+    """Stream the upload to a temporary file, hashing it on the way.
+
+    original_path is where the content lives once stored; the caller moves
+    temp_path there with store_original() if the bytes are new, or
+    removes it if an identical blob already exists.
+    """
     file_extension = file.filename.split('.')[-1].lower()
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
+    # Same filesystem as the blobs, so storing is an atomic rename
+    incoming_dir = os.path.join(upload_dir, "blobs", "incoming")
+    create_directory(incoming_dir)
+    temp_path = os.path.join(incoming_dir, f"{uuid.uuid4()}.tmp")
     
-    # Create directories
-    product_dir = os.path.join(upload_dir, "products", product_id)
-    original_dir = os.path.join(product_dir, "original")
+    digest = hashlib.sha256()
+    file_size = 0
+    with open(temp_path, "wb") as buffer:
+        while chunk := file.file.read(COPY_CHUNK_SIZE):
+            digest.update(chunk)
+            buffer.write(chunk)
+            file_size += len(chunk)
+    
+    sha256 = digest.hexdigest()
+    filename = f"{sha256}.{file_extension}"
+    return {
+        "sha256": sha256,
+        "filename": filename,
+        "temp_path": temp_path,
+        "original_path": os.path.join(blob_directory(upload_dir, sha256), "original", filename),
+        "file_size": file_size
+    }
+
+def store_original(temp_path: str, original_path: str):
+    create_directory(os.path.dirname(original_path))
+    os.replace(temp_path, original_path)
+
+def create_image_variants(original_path: str, product_dir: str, filename: str) -> dict:
+    """Render medium and thumbnail variants of a saved original.
+
+    CPU bound and self-contained so it can run in a worker process."""
     medium_dir = os.path.join(product_dir, "medium")
     thumb_dir = os.path.join(product_dir, "thumbnail")
-    
-    create_directory(original_dir)
     create_directory(medium_dir)
     create_directory(thumb_dir)
     
-    # Save original
-    original_path = os.path.join(original_dir, unique_filename)
-    with open(original_path, "wb") as buffer:
-        content = file.file.read()
-        buffer.write(content)
-    
-    # Create resized versions
     with Image.open(original_path) as img:
         # Convert to RGB if necessary
         if img.mode in ("RGBA", "P"):
@@ -42,19 +94,52 @@ def process_product_image(file: UploadFile, product_id: str, upload_dir: str) ->
         # Create medium size
         img_medium = img.copy()
         img_medium.thumbnail(MEDIUM_SIZE, Image.Resampling.LANCZOS)
-        medium_path = os.path.join(medium_dir, unique_filename)
+        medium_path = os.path.join(medium_dir, filename)
         img_medium.save(medium_path, optimize=True, quality=85)
         
         # Create thumbnail
         img_thumb = img.copy()
         img_thumb.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
-        thumb_path = os.path.join(thumb_dir, unique_filename)
+        thumb_path = os.path.join(thumb_dir, filename)
         img_thumb.save(thumb_path, optimize=True, quality=80)
     
     return {
-        "filename": unique_filename,
-        "original_path": original_path,
         "medium_path": medium_path,
-        "thumbnail_path": thumb_path,
-        "file_size": os.path.getsize(original_path)
-    }
\ No newline at end of file
+        "thumbnail_path": thumb_path
+    }
+
+def render_derivative(
+    original_path: str,
+    output_path: str,
+    width: Optional[int],
+    height: Optional[int],
+    fit: str,
+    image_format: str
+) -> int:
+    """Render one resized copy of an original and return its size in bytes.
+
+    contain fits the image inside width x height keeping its aspect ratio
+    (either bound may be None); cover crops it to fill the box exactly.
+    The file is written under a temporary name and renamed into place, so
+    readers never see a partial image. CPU bound; runs in a worker process.
+    """
+    pil_format, options = DERIVATIVE_FORMATS[image_format]
+    
+    with Image.open(original_path) as img:
+        img = ImageOps.exif_transpose(img)
+        if pil_format == "JPEG" and img.mode != "RGB":
+            img = img.convert("RGB")
+        elif img.mode == "P":
+            img = img.convert("RGBA")
+        
+        if fit == "cover" and width and height:
+            img = ImageOps.fit(img, (width, height), Image.Resampling.LANCZOS)
+        else:
+            img.thumbnail((width or img.width, height or img.height), Image.Resampling.LANCZOS)
+        
+        create_directory(os.path.dirname(output_path))
+        temp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        img.save(temp_path, pil_format, **options)
+    
+    os.replace(temp_path, output_path)
+    return os.path.getsize(output_path)
@@ -0,0 +1,205 @@
+import os
+from email.utils import formatdate, parsedate
+from typing import Optional, Tuple
+from urllib.parse import quote
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# For files whose name is derived from their content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else may be cached but is revalidated (usually a 304) on each use
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """First and last byte of a single "bytes=" range, or None if the header
+    should be ignored (malformed, another unit, or several ranges, which are
+    answered with the whole file). Raises RangeNotSatisfiable if the range
+    lies past the end of the file."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not (first.isdigit() or last.isdigit()):
+        return None
+    if not first:
+        # Suffix range: the last n bytes
+        if not last.isdigit():
+            return None
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    if not first.isdigit() or (last and not last.isdigit()):
+        return None
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, (min(int(last), size - 1) if last else size - 1)
+
+class MediaFileResponse(FileResponse):
+    """FileResponse with strong validators, conditional GETs and byte ranges.
+
+    The ETag is built from the modification time (ns) and size, and files
+    are only ever replaced whole, so it is strong enough for If-Range. The
+    body is sent with the server's zero-copy extension when it offers one.
+    With accel_path set, the response only carries accel_header (nginx's
+    X-Accel-Redirect, or X-Sendfile with a filesystem path) and the
+    fronting proxy transfers the file and serves ranges itself.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        status_code: int = 200,
+        media_type: Optional[str] = None,
+        cache_control: str = REVALIDATE_CACHE_CONTROL,
+        stat_result: Optional[os.stat_result] = None,
+        method: Optional[str] = None,
+        accel_path: Optional[str] = None,
+        accel_header: str = "X-Accel-Redirect"
+    ):
+        super().__init__(
+            path,
+            status_code=status_code,
+            headers={"Cache-Control": cache_control, "Accept-Ranges": "bytes"},
+            media_type=media_type,
+            stat_result=stat_result,
+            method=method
+        )
+        self.accel_path = accel_path
+        self.accel_header = accel_header
+
+    def set_stat_headers(self, stat_result: os.stat_result):
+        self.size = stat_result.st_size
+        self.headers.setdefault("content-length", str(stat_result.st_size))
+        self.headers.setdefault("last-modified", formatdate(stat_result.st_mtime, usegmt=True))
+        self.headers.setdefault("etag", f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"')
+
+    def is_not_modified(self, request_headers: Headers) -> bool:
+        # If-None-Match takes precedence and uses the weak comparison
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            etag = self.headers["etag"]
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is not None:
+            since, modified = parsedate(if_modified_since), parsedate(self.headers["last-modified"])
+            return since is not None and modified is not None and since >= modified
+        return False
+
+    def if_range_matches(self, request_headers: Headers) -> bool:
+        # Strong comparison: an ETag, or the exact Last-Modified date
+        if_range = request_headers.get("if-range")
+        return if_range is None or if_range.strip() in (self.headers["etag"], self.headers["last-modified"])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if self.stat_result is None:
+            self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            self.set_stat_headers(self.stat_result)
+        request_headers = Headers(scope=scope)
+
+        if self.status_code == 200 and self.is_not_modified(request_headers):
+            await NotModifiedResponse(self.headers)(scope, receive, send)
+            return
+
+        if self.accel_path is not None:
+            del self.headers["content-length"]
+            self.headers[self.accel_header] = self.accel_path
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        start, end = 0, self.size - 1
+        range_header = request_headers.get("range")
+        if range_header and self.status_code == 200 and self.if_range_matches(request_headers):
+            try:
+                byte_range = parse_range(range_header, self.size)
+            except RangeNotSatisfiable:
+                response = Response(
+                    status_code=416,
+                    headers={"Content-Range": f"bytes */{self.size}", "Accept-Ranges": "bytes"}
+                )
+                await response(scope, receive, send)
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                self.status_code = 206
+                self.headers["content-range"] = f"bytes {start}-{end}/{self.size}"
+                self.headers["content-length"] = str(end - start + 1)
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b""})
+        else:
+            await self.send_body(scope, send, start, end - start + 1)
+        if self.background is not None:
+            await self.background()
+
+    async def send_body(self, scope: Scope, send: Send, offset: int, count: int):
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopy" in extensions:
+            with open(self.path, "rb") as file:
+                await send({"type": "http.response.zerocopy", "file": file, "offset": offset, "count": count})
+        elif "http.response.pathsend" in extensions and offset == 0 and count == self.size:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(offset)
+                while True:
+                    chunk = await file.read(min(self.chunk_size, count))
+                    count -= len(chunk)
+                    more_body = count > 0 and len(chunk) > 0
+                    await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                    if not more_body:
+                        break
+
+class MediaFiles(StaticFiles):
+    """StaticFiles serving MediaFileResponse.
+
+    Files under one of immutable_prefixes are named after their content
+    and get a year-long immutable Cache-Control; the rest are revalidated.
+    With accel_prefix set, responses hand the transfer to the fronting
+    proxy: accel_header is set to accel_prefix + the file's relative path.
+    """
+
+    def __init__(
+        self,
+        *,
+        directory: str,
+        immutable_prefixes: Tuple[str, ...] = (),
+        accel_prefix: Optional[str] = None,
+        accel_header: str = "X-Accel-Redirect",
+        **kwargs
+    ):
+        super().__init__(directory=directory, **kwargs)
+        self.immutable_prefixes = tuple(prefix.rstrip("/") + "/" for prefix in immutable_prefixes)
+        self.accel_prefix = accel_prefix
+        self.accel_header = accel_header
+
+    def file_response(self, full_path: str, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        relative_path = os.path.relpath(full_path, os.path.realpath(self.directory)).replace(os.sep, "/")
+        cache_control = (
+            IMMUTABLE_CACHE_CONTROL if relative_path.startswith(self.immutable_prefixes)
+            else REVALIDATE_CACHE_CONTROL
+        )
+        accel_path = None
+        if self.accel_prefix:
+            accel_path = self.accel_prefix.rstrip("/") + "/" + quote(relative_path)
+        return MediaFileResponse(
+            full_path,
+            status_code=status_code,
+            cache_control=cache_control,
+            stat_result=stat_result,
+            method=scope["method"],
+            accel_path=accel_path,
+            accel_header=self.accel_header
+        )
@@ -0,0 +1,180 @@
+import bisect
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    def __init__(self, name: str, kind: str, help_text: str):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.items())
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, _format_labels(labels), value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return "\n".join(lines)
+
+class Histogram(Metric):
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        super().__init__(name, "histogram", help_text)
+        self.buckets = buckets
+        self.series: Dict[Labels, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.items())
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                yield f"{self.name}_bucket", _format_labels(labels, f'le="{le}"'), cumulative
+            yield f"{self.name}_sum", _format_labels(labels), series[-1]
+            yield f"{self.name}_count", _format_labels(labels), cumulative
+
+class MetricsRegistry:
+    """Request and database metrics, rendered in the Prometheus text format.
+
+    Values are per worker process; Prometheus scrapes each worker (or sums
+    them) like any other multi-process target. Only touched on the event
+    loop, so no locking.
+    """
+
+    def __init__(self):
+        self.requests = Metric("http_requests_total", "counter", "Requests by route and status")
+        self.in_progress = Metric("http_requests_in_progress", "gauge", "Requests being served")
+        self.latency = Histogram("http_request_duration_seconds", "Time to the end of the response", LATENCY_BUCKETS)
+        self.db_queries = Histogram("http_request_db_queries", "SQL statements per request", QUERY_BUCKETS)
+        self.db_seconds = Metric("http_request_db_seconds_total", "counter", "Time spent in SQL statements")
+        self.db_rows = Metric("http_request_db_rows_total", "counter", "Rows returned or affected by SQL statements")
+
+    def render(self) -> str:
+        metrics = (self.requests, self.in_progress, self.latency, self.db_queries, self.db_seconds, self.db_rows)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+metrics = MetricsRegistry()
+
+@dataclass
+class RequestCost:
+    queries: int = 0
+    db_seconds: float = 0.0
+    rows: int = 0
+
+# The current request's cost; statements run in threadpool workers and in
+# tasks spawned by the request are attributed to it as well
+request_cost: ContextVar[Optional[RequestCost]] = ContextVar("request_cost", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    cost = request_cost.get()
+    if cost is not None:
+        cost.queries += 1
+        cost.db_seconds += time.perf_counter() - started
+        cost.rows += max(cursor.rowcount, 0)
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+def instrument_engine(engine: Engine):
+    """Attribute the engine's statements to the request running them"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def _route_label(scope: Scope) -> str:
+    # The route template, not the path, to keep label cardinality bounded
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        # A mounted app such as /uploads
+        return scope.get("root_path") or "/"
+    return "unmatched"
+
+class MetricsMiddleware:
+    """Records latency, status and database cost per route into `metrics`,
+    and adds a Server-Timing header with the database share of the time
+    spent before the response started."""
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        cost = RequestCost()
+        token = request_cost.set(cost)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={cost.db_seconds * 1000:.1f};desc="{cost.queries} queries", app;dur={elapsed:.1f}'
+                    )
+            await send(message)
+
+        metrics.in_progress.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_cost.reset(token)
+            metrics.in_progress.dec(method=method)
+            route = _route_label(scope)
+            metrics.requests.inc(method=method, route=route, status=str(status_code))
+            metrics.latency.observe(time.perf_counter() - started, method=method, route=route)
+            metrics.db_queries.observe(cost.queries, route=route)
+            metrics.db_seconds.inc(cost.db_seconds, route=route)
+            metrics.db_rows.inc(cost.rows, route=route)
@@ -0,0 +1,44 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Tuple
+from uuid import UUID
+
+class InvalidCursor(ValueError):
+    pass
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+def _decode_value(value: Any):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+def encode_cursor(sort_key: str, descending: bool, value: Any, row_id: UUID) -> str:
+    """Encode the last row's sort key and id as an opaque keyset cursor"""
+    payload = {"s": sort_key, "d": descending, "v": _encode_value(value), "id": str(row_id)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_key: str, descending: bool) -> Tuple[Any, UUID]:
+    """Decode a cursor, checking it was issued for the same ordering"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["s"] != sort_key or payload["d"] != descending:
+            raise InvalidCursor("Cursor does not match the requested sort order")
+        return _decode_value(payload["v"]), UUID(payload["id"])
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
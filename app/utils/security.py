@@ -1,9 +1,15 @@
 from datetime import datetime, timedelta
+from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
+# Hashes at another cost are replaced on the next login (see PasswordHasher.verify)
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256"],
+    deprecated="auto",
+    bcrypt_sha256__rounds=settings.password_hash_rounds
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -28,14 +34,18 @@ def create_refresh_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm="HS256")
     return encoded_jwt
 
-def verify_token(token: str, token_type: str = "access"):
+def decode_token(token: str, token_type: str = "access") -> Optional[dict]:
+    """Return the token's claims if it is valid and of the given type"""
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
-        if payload.get("type") != token_type:
-            return None
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        if payload.get("type") != token_type or payload.get("sub") is None:
             return None
-        return user_id
+        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def verify_token(token: str, token_type: str = "access"):
+    payload = decode_token(token, token_type)
+    if payload is None:
+        return None
+    return payload["sub"]
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""Latency and throughput benchmarks for the request hot paths.
+
+Seeds BENCHMARK_DATABASE_URL (a scratch database; DATABASE_URL is never
+used) with benchmark data, then drives the app in-process over ASGI, so
+no network or server config is involved, and reports p50/p95/p99
+latency and throughput per scenario:
+
+    BENCHMARK_DATABASE_URL=postgresql://localhost/marketplace_bench \
+        python -m benchmarks.run --products 20000 --output results.json
+
+Caches (see app.caches.reset_caches) are cleared before every request
+unless --warm is given, so the numbers measure the services rather than
+cache hits. Compare runs with
+the same arguments across commits; the JSON records the commit and the
+arguments used. Image uploads are written to UPLOAD_DIRECTORY.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+Request = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def _png(rng: random.Random) -> bytes:
+    from PIL import Image
+    # Distinct bytes every time, so each upload stores (and renders) a new blob
+    image = Image.frombytes("RGB", (64, 64), bytes(rng.getrandbits(8) for _ in range(64 * 64 * 3)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def build_scenarios(data: dict, seller: dict, buyer: dict) -> Dict[str, Request]:
+    product_ids = [str(product_id) for product_id in data["product_ids"]]
+    conversation_ids = [str(conversation_id) for conversation_id in data["conversation_ids"]]
+    search = {
+        "newest": lambda rng: {},
+        "price_asc": lambda rng: {"sort_by": "price", "sort_order": "asc"},
+        "popular": lambda rng: {"sort_by": "views_count"},
+        "text": lambda rng: {"query": rng.choice(data["items"])},
+        "text_fuzzy": lambda rng: {"query": rng.choice(data["items"])[:-1], "match": "fuzzy"},
+        "city": lambda rng: {"city": rng.choice(data["cities"])},
+        "category_price": lambda rng: {
+            "category_id": str(rng.choice(data["category_ids"])), "min_price": 10000, "max_price": 200000
+        },
+        "deep_offset": lambda rng: {"skip": rng.randint(100, 1000)},
+    }
+
+    def search_request(params: Callable[[random.Random], dict]) -> Request:
+        return lambda client, rng: client.get("/api/products/", params=params(rng))
+
+    scenarios: Dict[str, Request] = {f"search_products[{name}]": search_request(params) for name, params in search.items()}
+    scenarios.update({
+        "product_facets": lambda client, rng: client.get(
+            "/api/products/facets", params={"query": rng.choice(data["items"]), "facets": "category,condition,state"}
+        ),
+        "product_detail": lambda client, rng: client.get(f"/api/products/{rng.choice(product_ids)}"),
+        "conversation_inbox": lambda client, rng: client.get("/api/conversations/inbox", headers=buyer),
+        "send_message": lambda client, rng: client.post(
+            f"/api/conversations/{rng.choice(conversation_ids)}/messages",
+            headers=buyer,
+            json={"message": "Is this lot still available?"}
+        ),
+        "image_upload": lambda client, rng: client.post(
+            f"/api/products/{data['seller_product_id']}/images",
+            headers=seller,
+            files={"files": ("bench.png", _png(rng), "image/png")}
+        ),
+        "login": lambda client, rng: client.post(
+            "/api/auth/login", json={"email": data["buyer_email"], "password": data["password"]}
+        ),
+    })
+    return scenarios
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    request: Request,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    warm: bool,
+    random_seed: int
+) -> dict:
+    from app.caches import reset_caches
+    rng = random.Random(random_seed)
+    for _ in range(warmup):
+        await request(client, rng)
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            if not warm:
+                reset_caches()
+            started = time.perf_counter()
+            try:
+                response = await request(client, rng)
+                if response.status_code >= 400:
+                    errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2),
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2)
+        }
+    }
+
+def git_revision() -> Optional[dict]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return {"commit": commit, "dirty": bool(dirty)}
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def benchmark(args) -> dict:
+    from app.config import settings
+    from app.main import app
+    from app.services.dashboard_counters import dashboard_counters
+    from benchmarks.seed import seed
+
+    data = seed(args.products, args.sellers, args.conversations, args.seed)
+    results = {}
+    async with app.router.lifespan_context(app):
+        # The bulk inserts bypass the ORM hooks that keep the dashboard counters
+        await dashboard_counters.reconcile()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+            seller = await login(client, data["seller_email"], data["password"])
+            buyer = await login(client, data["buyer_email"], data["password"])
+            scenarios = build_scenarios(data, seller, buyer)
+            selected = [
+                name for name in scenarios
+                if not args.scenarios or any(name == wanted or name.startswith(wanted + "[") for wanted in args.scenarios)
+            ]
+            for name in selected:
+                requests = args.login_requests if name == "login" else args.requests
+                result = await run_scenario(
+                    client, scenarios[name], requests, args.concurrency, args.warmup, args.warm, args.seed
+                )
+                results[name] = result
+                latency = result["latency_ms"]
+                print(
+                    f"{name:36} {result['throughput_rps']:>8.1f} req/s  p50 {latency['p50']:>8.2f}  "
+                    f"p95 {latency['p95']:>8.2f}  p99 {latency['p99']:>8.2f} ms"
+                    + (f"  errors {result['errors']}" if result["errors"] else ""),
+                    file=sys.stderr
+                )
+
+    return {
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "arguments": {key: value for key, value in vars(args).items() if key != "output"},
+        "dataset": {
+            "products": len(data["product_ids"]),
+            "conversations": len(data["conversation_ids"])
+        },
+        "settings": {
+            "async_pool_size": settings.async_pool_size,
+            "password_hash_rounds": settings.password_hash_rounds,
+            "password_hash_workers": settings.password_hash_workers,
+            "product_cache_shared": settings.product_cache_shared
+        },
+        "scenarios": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--products", type=int, default=5000, help="products to seed (default 5000)")
+    parser.add_argument("--sellers", type=int, default=20)
+    parser.add_argument("--conversations", type=int, default=50, help="in the benchmark buyer's inbox")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=20, help="timed logins (bcrypt is slow by design)")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight per scenario")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed requests before each scenario")
+    parser.add_argument("--warm", action="store_true", help="leave the response caches on")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for data and request parameters")
+    parser.add_argument("--scenarios", nargs="*", help="run only these, e.g. search_products product_detail")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    # Like the tests' TEST_DATABASE_URL: seeding must never land in DATABASE_URL by accident
+    database_url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not database_url:
+        parser.error("set BENCHMARK_DATABASE_URL to a scratch database to seed and benchmark")
+    # Read by app.config, which is only imported from here on
+    os.environ["DATABASE_URL"] = database_url
+
+    report = asyncio.run(benchmark(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Deterministic benchmark data: sellers, products with a shared image,
+and a buyer with an inbox of conversations.
+
+Rows are tagged by the bench- email/slug prefix, so seeding is idempotent
+and only tops the data set up to the requested size.
+"""
+import hashlib
+import io
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import func, insert, select
+from app.config import settings
+from app.database import SessionLocal
+from app.models import (
+    Category, Conversation, ImageBlob, ImageStatus, Material, Product,
+    ProductCondition, ProductImage, User, UserType
+)
+from app.schemas.conversation import ConversationCreate, MessageCreate
+from app.services.conversation_service import ConversationService
+from app.utils.image_processing import blob_directory
+from app.utils.security import get_password_hash
+
+PASSWORD = "benchpass123"
+BATCH_SIZE = 1000
+
+CATEGORIES = ["Textile Machinery Parts", "Automobile Parts", "Raw Materials", "Hydraulic Components", "Electrical Equipment"]
+MATERIALS = ["Mild Steel", "Stainless Steel", "Aluminium", "Cast Iron", "Brass", "Copper"]
+ITEMS = ["lathe", "gearbox", "bearing", "hydraulic pump", "motor", "valve", "spindle", "compressor", "conveyor belt", "cylinder"]
+ADJECTIVES = ["heavy duty", "precision", "industrial", "used", "surplus", "refurbished", "high speed", "compact"]
+CITIES = [("Pune", "Maharashtra"), ("Mumbai", "Maharashtra"), ("Coimbatore", "Tamil Nadu"), ("Ludhiana", "Punjab"),
+          ("Ahmedabad", "Gujarat"), ("Surat", "Gujarat"), ("Bengaluru", "Karnataka"), ("Chennai", "Tamil Nadu")]
+
+def _user(role: str, i: int, password_hash: str) -> dict:
+    number = (0 if role == "seller" else 5000) + i
+    return {
+        "email": f"bench-{role}-{i}@bench.local",
+        "phone": f"90000{number:05d}",
+        "password_hash": password_hash,
+        "company_name": f"Bench {role.title()} {i}",
+        "contact_person": f"Bench Person {i}",
+        "gst_number": f"27BENCH{number:04d}C1Z{number % 10}",
+        "city": "Pune",
+        "state": "Maharashtra",
+        "is_verified": True,
+        "user_type": UserType.both
+    }
+
+def _ensure_users(db, role: str, count: int, password_hash: str) -> List[User]:
+    existing = {user.email: user for user in db.scalars(select(User).where(User.email.like(f"bench-{role}-%")))}
+    for i in range(count):
+        values = _user(role, i, password_hash)
+        if values["email"] not in existing:
+            user = User(**values)
+            db.add(user)
+            existing[user.email] = user
+    db.commit()
+    return [existing[f"bench-{role}-{i}@bench.local"] for i in range(count)]
+
+def _ensure_named(db, model, names: List[str]) -> list:
+    rows = []
+    for name in names:
+        slug = "bench-" + name.lower().replace(" ", "-")
+        row = db.scalar(select(model).where(model.slug == slug))
+        if row is None:
+            row = model(name=name, slug=slug, description=f"{name} (benchmark data)")
+            db.add(row)
+        rows.append(row)
+    db.commit()
+    return rows
+
+def _ensure_blob(db) -> ImageBlob:
+    """One PNG shared by every seeded product, as identical uploads are"""
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), (90, 110, 130)).save(buffer, format="PNG")
+    data = buffer.getvalue()
+    sha = hashlib.sha256(data).hexdigest()
+    blob = db.get(ImageBlob, sha)
+    if blob is None:
+        directory = os.path.join(blob_directory(settings.upload_directory, sha), "original")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{sha}.png")
+        with open(path, "wb") as file:
+            file.write(data)
+        blob = ImageBlob(sha256=sha, original_path=path, file_size=len(data), mime_type="image/png", status=ImageStatus.ready)
+        db.add(blob)
+        db.commit()
+    return blob
+
+def seed(products: int, sellers: int, conversations: int, random_seed: int = 1) -> Dict[str, object]:
+    """Top the bench data set up to the given sizes and describe it"""
+    rng = random.Random(random_seed)
+    with SessionLocal() as db:
+        password_hash = get_password_hash(PASSWORD)
+        seller_users = _ensure_users(db, "seller", sellers, password_hash)
+        buyer = _ensure_users(db, "buyer", 1, password_hash)[0]
+        categories = _ensure_named(db, Category, CATEGORIES)
+        materials = _ensure_named(db, Material, MATERIALS)
+        blob = _ensure_blob(db)
+
+        seller_ids = [user.id for user in seller_users]
+        existing = db.scalar(select(func.count()).select_from(Product).where(Product.seller_id.in_(seller_ids)))
+        now = datetime.utcnow()
+        for start in range(existing, products, BATCH_SIZE):
+            rows = []
+            for i in range(start, min(start + BATCH_SIZE, products)):
+                city, state = rng.choice(CITIES)
+                title = f"{rng.choice(ADJECTIVES).title()} {rng.choice(ITEMS)} {rng.choice(MATERIALS).lower()} #{i}"
+                created_at = now - timedelta(minutes=products - i)
+                rows.append({
+                    "seller_id": seller_ids[i % len(seller_ids)],
+                    "title": title,
+                    "description": f"{title} available for immediate dispatch from {city}. Lot number {i}.",
+                    "category_id": rng.choice(categories).id,
+                    "material_id": rng.choice(materials).id,
+                    "quantity": rng.randint(1, 500),
+                    "unit": "pieces",
+                    "price": round(rng.uniform(500, 500000), 2),
+                    "condition": rng.choice(list(ProductCondition)),
+                    "location_city": city,
+                    "location_state": state,
+                    "views_count": rng.randint(0, 5000),
+                    "created_at": created_at,
+                    "updated_at": created_at
+                })
+            product_ids = db.scalars(insert(Product).returning(Product.id), rows).all()
+            db.execute(insert(ProductImage), [{
+                "product_id": product_id,
+                "blob_sha256": blob.sha256,
+                "image_path": blob.original_path,
+                "image_name": "bench.png",
+                "is_primary": True,
+                "file_size": blob.file_size,
+                "mime_type": blob.mime_type,
+                "status": ImageStatus.ready
+            } for product_id in product_ids])
+            db.commit()
+
+        # Through the service, so the inbox summary columns are maintained
+        have = db.scalar(select(func.count()).select_from(Conversation).where(Conversation.buyer_id == buyer.id))
+        if have < conversations:
+            candidates = db.scalars(
+                select(Product.id).where(Product.seller_id.in_(seller_ids)).order_by(Product.created_at.desc()).limit(conversations * 2)
+            ).all()
+            for product_id in candidates:
+                if have >= conversations:
+                    break
+                # Returns the existing conversation, which already has messages
+                conversation = ConversationService.create_conversation(db, ConversationCreate(product_id=product_id), buyer.id)
+                if conversation.messages:
+                    continue
+                for j in range(3):
+                    sender = buyer.id if j % 2 == 0 else conversation.seller_id
+                    ConversationService.send_message(db, conversation.id, sender, MessageCreate(message=f"Bench message {j}"))
+                have += 1
+
+        conversation_ids = db.scalars(select(Conversation.id).where(Conversation.buyer_id == buyer.id)).all()
+        product_ids = db.scalars(
+            select(Product.id).where(Product.seller_id.in_(seller_ids), Product.is_active == True)
+        ).all()
+        return {
+            "seller_email": seller_users[0].email,
+            "buyer_email": buyer.email,
+            "password": PASSWORD,
+            "seller_product_id": db.scalar(select(Product.id).where(Product.seller_id == seller_ids[0]).limit(1)),
+            "product_ids": product_ids,
+            "conversation_ids": conversation_ids,
+            "category_ids": [category.id for category in categories],
+            "cities": [city for city, _ in CITIES],
+            "items": ITEMS
+        }
@@ -0,0 +1,292 @@
+"""Fixtures for tests that run the app against a real PostgreSQL database.
+
+Set TEST_DATABASE_URL to a scratch database (its tables are created on
+import and test rows are left behind); without it the tests that use
+the `app` fixture are skipped rather than run against DATABASE_URL.
+Unit tests run either way.
+"""
+import io
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# Settings are read when app.config is first imported, by unit tests too
+_scratch = tempfile.mkdtemp(prefix="marketplace-tests-")
+# Never connected to without TEST_DATABASE_URL: the tests that would are skipped
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or "postgresql://unused@localhost/unused"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GST_VERIFICATION_API_KEY", "test")
+os.environ["UPLOAD_DIRECTORY"] = os.path.join(_scratch, "uploads")
+os.environ["DERIVATIVE_CACHE_DIRECTORY"] = os.path.join(_scratch, "derivatives")
+os.environ["IMPORT_DIRECTORY"] = os.path.join(_scratch, "imports")
+os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+
+def pytest_collection_modifyitems(config, items):
+    if not TEST_DATABASE_URL:
+        skip = pytest.mark.skip(reason="TEST_DATABASE_URL is not set")
+        for item in items:
+            if "app" in getattr(item, "fixturenames", ()):
+                item.add_marker(skip)
+
+class QueryRecorder:
+    """SQL statements run by requests (see app.utils.metrics.request_cost)
+    while recording. Statements from background tasks started by the
+    lifespan are not attributed to any request and are ignored."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self.active = False
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        from app.utils.metrics import request_cost
+        if self.active and request_cost.get() is not None:
+            self.statements.append(statement)
+
+    @contextmanager
+    def record(self):
+        self.statements = []
+        self.active = True
+        try:
+            yield self.statements
+        finally:
+            self.active = False
+
+def format_statements(statements: List[str]) -> str:
+    return "\n".join(f"  {i}. {' '.join(statement.split())}" for i, statement in enumerate(statements, 1))
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+@pytest.fixture(scope="session")
+def app():
+    from sqlalchemy.exc import OperationalError
+    from app.database import engine
+    try:
+        with engine.connect():
+            pass
+    except OperationalError as e:
+        pytest.skip(f"Test database unavailable: {e}")
+    from app.main import app
+    return app
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+    # One client (and so one lifespan) per session: the service singletons
+    # bind to the event loop they start on
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def query_recorder(app):
+    from sqlalchemy import event
+    from app.database import async_engine, engine
+    recorder = QueryRecorder()
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "after_cursor_execute", recorder.after_cursor_execute)
+    yield recorder
+    for target in (engine, async_engine.sync_engine):
+        event.remove(target, "after_cursor_execute", recorder.after_cursor_execute)
+
+@pytest.fixture
+def count_queries(query_recorder):
+    """`with count_queries() as statements:` collects the SQL run by requests
+    made inside the block"""
+    return query_recorder.record
+
+class BudgetedClient:
+    """Wraps the TestClient so every request is checked against its route's
+    query budget, measured with all caches cold.
+
+    Budgets are declared per route name (the endpoint function's name) in
+    the test module's QUERY_BUDGETS; calling a route without one fails, so
+    new endpoints can't skip the check.
+    """
+
+    def __init__(self, client, recorder: QueryRecorder, budgets: Dict[str, int]):
+        self.client = client
+        self.recorder = recorder
+        self.budgets = budgets
+
+    def route_name(self, method: str, url: str) -> str:
+        from starlette.routing import Match
+        path = url.split("?", 1)[0]
+        scope = {"type": "http", "method": method, "path": path, "root_path": ""}
+        for route in self.client.app.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.name
+        raise LookupError(f"No route for {method} {path}")
+
+    def request(self, method: str, url: str, **kwargs):
+        name = self.route_name(method, url)
+        if name not in self.budgets:
+            raise QueryBudgetExceeded(f"No query budget declared for route {name!r} ({method} {url})")
+        budget = self.budgets[name]
+        from app.caches import reset_caches
+        reset_caches()
+        with self.recorder.record() as statements:
+            response = self.client.request(method, url, **kwargs)
+        if len(statements) > budget:
+            raise QueryBudgetExceeded(
+                f"{method} {url} ({name}) ran {len(statements)} queries, budget is {budget}:\n"
+                + format_statements(statements)
+            )
+        return response
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+@pytest.fixture
+def budgeted_client(request, client, query_recorder):
+    return BudgetedClient(client, query_recorder, getattr(request.module, "QUERY_BUDGETS", {}))
+
+def _register(client, verified: bool = False) -> dict:
+    suffix = uuid.uuid4().int
+    user = {
+        "email": f"user{suffix % 10**12}@example.com",
+        "phone": f"9{suffix % 10**9:09d}",
+        "password": "password123",
+        "company_name": "Test Industries",
+        "contact_person": "Test Person",
+        "gst_number": f"27AAAPL{suffix % 10**4:04d}C1Z{suffix % 10}",
+        "city": "Pune",
+        "state": "Maharashtra",
+        "pincode": "411001"
+    }
+    response = client.post("/api/auth/register", json=user)
+    assert response.status_code == 201, response.text
+    user_id = response.json()["id"]
+    if verified:
+        client.put(f"/api/admin/users/{user_id}/verify")
+    tokens = client.post("/api/auth/login", json={"email": user["email"], "password": user["password"]}).json()
+    return {"id": user_id, "headers": {"Authorization": f"Bearer {tokens['access_token']}"}}
+
+def _png(color) -> bytes:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@pytest.fixture(scope="session")
+def marketplace(client) -> dict:
+    """A verified seller with a full page of products, each with images,
+    and a buyer with a conversation about the first product"""
+    from app.database import SessionLocal
+    from app.models.category import Category
+    with SessionLocal() as db:
+        slug = f"test-{uuid.uuid4().hex[:12]}"
+        category = Category(name="Test Machinery", slug=slug)
+        db.add(category)
+        db.commit()
+        category_id = str(category.id)
+
+    seller = _register(client, verified=True)
+    buyer = _register(client)
+    products, images = [], []
+    for i in range(25):
+        response = client.post("/api/products/", headers=seller["headers"], json={
+            "title": f"Test lathe machine {i}",
+            "description": "A used lathe machine in good condition",
+            "category_id": category_id,
+            "quantity": 1,
+            "price": 1000 + i,
+            "location_city": "Pune",
+            "location_state": "Maharashtra"
+        })
+        assert response.status_code == 201, response.text
+        product_id = response.json()["id"]
+        files = [("files", (f"{j}.png", _png((i, j, 0)), "image/png")) for j in range(2)]
+        response = client.post(f"/api/products/{product_id}/images", headers=seller["headers"], files=files, data={"is_primary": "true"})
+        assert response.status_code == 200, response.text
+        products.append(product_id)
+        images.extend((product_id, image["id"]) for image in response.json()["images"])
+
+    # Let the image pipeline finish so its writes don't land in a measured request
+    deadline = time.monotonic() + 60
+    for product_id, image_id in images:
+        while client.get(f"/api/products/{product_id}/images/{image_id}").json()["status"] == "processing":
+            assert time.monotonic() < deadline, "image pipeline did not finish"
+            time.sleep(0.1)
+
+    response = client.post("/api/conversations/", headers=buyer["headers"], json={"product_id": products[0]})
+    assert response.status_code == 201, response.text
+    conversation_id = response.json()["id"]
+    for i in range(5):
+        sender = buyer if i % 2 == 0 else seller
+        client.post(f"/api/conversations/{conversation_id}/messages", headers=sender["headers"], json={"message": f"Message {i}"})
+
+    return {
+        "category_id": category_id,
+        "seller": seller,
+        "buyer": buyer,
+        "products": products,
+        "conversation_id": conversation_id
+    }
+
+@pytest.fixture
+def new_user(client) -> dict:
+    """A fresh unverified user, for tests that deactivate or otherwise change it"""
+    return _register(client)
+
+@pytest.fixture
+def new_product(client, marketplace) -> str:
+    """A fresh product of the marketplace seller, for tests that change its
+    images. It gets a category of its own, so the marketplace category
+    keeps exactly its 25 products."""
+    from app.database import SessionLocal
+    from app.models.category import Category
+    with SessionLocal() as db:
+        category = Category(name="Test Drills", slug=f"test-{uuid.uuid4().hex[:12]}")
+        db.add(category)
+        db.commit()
+        category_id = str(category.id)
+
+    response = client.post("/api/products/", headers=marketplace["seller"]["headers"], json={
+        "title": "Test drill press",
+        "description": "A used drill press",
+        "category_id": category_id,
+        "quantity": 1,
+        "price": 500,
+        "location_city": "Pune",
+        "location_state": "Maharashtra"
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+@pytest.fixture
+def make_png():
+    """make_png((r, g, b)) -> a small PNG of that colour"""
+    return _png
+
+@pytest.fixture
+def upload_image(client, marketplace):
+    """upload_image(product_id, content, filename, content_type) -> the
+    image, once the pipeline has finished with it"""
+    def upload(product_id: str, content: bytes, filename: str = "image.png", content_type: str = "image/png") -> dict:
+        files = [("files", (filename, content, content_type))]
+        response = client.post(f"/api/products/{product_id}/images", headers=marketplace["seller"]["headers"], files=files)
+        assert response.status_code == 200, response.text
+        image = response.json()["images"][0]
+        deadline = time.monotonic() + 60
+        while image["status"] == "processing":
+            assert time.monotonic() < deadline, "image pipeline did not finish"
+            time.sleep(0.1)
+            image = client.get(f"/api/products/{product_id}/images/{image['id']}").json()
+        return image
+    return upload
@@ -0,0 +1,119 @@
+"""TTLCache and ResponseCache (app.utils.cache); no database."""
+import asyncio
+import time
+import pytest
+from app.utils.cache import ResponseCache, TTLCache
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)  # Capped at the cache's ttl
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+
+def test_ttl_cache_per_entry_ttl():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("short", 1, ttl=0.05)
+    cache.set("never", 2, ttl=0)
+    cache.set("long", 3)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    assert cache.get("never") is None
+    assert cache.get("long") == 3
+
+def test_ttl_cache_default_pop_clear_and_stats():
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("missing", "default") == "default"
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.pop("a")
+    cache.pop("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats() == {"size": 0, "maxsize": 10, "hits": 1, "misses": 2}
+
+def response(body: bytes, headers: dict = None):
+    async def compute():
+        return body, headers or {}
+    return compute
+
+@pytest.mark.asyncio
+async def test_response_cache_stores_and_hits():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    assert await cache.get_or_compute("k", response(b"body", {"X-Next-Cursor": "c"})) == (b"body", {"X-Next-Cursor": "c"})
+    assert await cache.get_or_compute("k", response(b"other")) == (b"body", {"X-Next-Cursor": "c"})
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes"] == len(b"body") + len("X-Next-Cursor") + len("c")
+
+@pytest.mark.asyncio
+async def test_response_cache_coalesces_concurrent_misses():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return b"body", {}
+
+    results = await asyncio.gather(*[cache.get_or_compute("k", compute) for _ in range(5)])
+    assert results == [(b"body", {})] * 5
+    assert calls == 1
+    assert cache.stats()["coalesced"] == 4
+
+@pytest.mark.asyncio
+async def test_response_cache_drops_computations_started_before_invalidate():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    started = asyncio.Event()
+
+    async def stale():
+        started.set()
+        await asyncio.sleep(0.05)
+        return b"stale", {}
+
+    pending = asyncio.create_task(cache.get_or_compute("k", stale))
+    await started.wait()
+    cache.invalidate()
+    # The caller that started it still gets its result, but it isn't stored
+    assert await pending == (b"stale", {})
+    assert await cache.get_or_compute("k", response(b"fresh")) == (b"fresh", {})
+    assert cache.generation == 1
+
+@pytest.mark.asyncio
+async def test_response_cache_bounds_total_size():
+    cache = ResponseCache(max_bytes=10, ttl=60)
+    await cache.get_or_compute("a", response(b"aaaa"))
+    await cache.get_or_compute("b", response(b"bbbb"))
+    await cache.get_or_compute("a", response(b"----"))  # Hit: a is now most recent
+    await cache.get_or_compute("c", response(b"cccc"))
+    assert cache.stats()["bytes"] <= 10
+    assert await cache.get_or_compute("a", response(b"new")) == (b"aaaa", {})
+    assert await cache.get_or_compute("b", response(b"new")) == (b"new", {})
+
+@pytest.mark.asyncio
+async def test_response_cache_skips_entries_larger_than_the_cache():
+    cache = ResponseCache(max_bytes=4, ttl=60)
+    assert await cache.get_or_compute("k", response(b"too large")) == (b"too large", {})
+    assert cache.stats()["entries"] == 0
+
+@pytest.mark.asyncio
+async def test_response_cache_expires_entries():
+    cache = ResponseCache(max_bytes=1000, ttl=0.05)
+    await cache.get_or_compute("k", response(b"old"))
+    await asyncio.sleep(0.1)
+    assert await cache.get_or_compute("k", response(b"new")) == (b"new", {})
@@ -0,0 +1,26 @@
+"""The /api/conversations/ws push channel against the test database."""
+import uuid
+from datetime import timedelta
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+def test_connection_closes_when_the_token_expires(client, new_user):
+    from app.api.conversations import WS_TOKEN_EXPIRED
+    from app.utils.security import create_access_token
+    token = create_access_token({"sub": new_user["id"]}, expires_delta=timedelta(seconds=1))
+    with client.websocket_connect(f"/api/conversations/ws?token={token}") as websocket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_text()
+    assert closed.value.code == WS_TOKEN_EXPIRED
+
+def test_deactivated_user_is_closed_on_the_next_frame(client, new_user):
+    token = new_user["headers"]["Authorization"].split()[1]
+    with client.websocket_connect(f"/api/conversations/ws?token={token}") as websocket:
+        websocket.send_json({"type": "typing", "conversation_id": str(uuid.uuid4())})
+        assert websocket.receive_json()["detail"] == "Conversation not found"
+
+        assert client.put(f"/api/admin/users/{new_user['id']}/deactivate").status_code == 200
+        websocket.send_json({"type": "typing", "conversation_id": str(uuid.uuid4())})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_text()
+    assert closed.value.code == 1008
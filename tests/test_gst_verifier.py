@@ -0,0 +1,129 @@
+"""GSTVerifier against a stubbed registry (httpx.MockTransport); no database."""
+import asyncio
+import httpx
+import pytest
+from app.services.gst_verifier import GSTVerifier, RegistryUnavailable
+
+GSTIN = "27AAAPL1234C1Z5"
+
+class Registry:
+    """Answers GET /{gstin} from `responses`, counting the calls"""
+
+    def __init__(self, responses=None, delay: float = 0.0):
+        self.responses = responses or {}
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(request)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        answer = self.responses.get(request.url.path.lstrip("/"), 404)
+        if isinstance(answer, Exception):
+            raise answer
+        if isinstance(answer, httpx.Response):
+            return answer
+        if isinstance(answer, int):
+            return httpx.Response(answer)
+        return httpx.Response(200, json=answer)
+
+def make_verifier(
+    registry: Registry, positive_ttl: float = 60, negative_ttl: float = 60,
+    rate: float = 1000, timeout: float = 1
+) -> GSTVerifier:
+    return GSTVerifier(
+        "http://registry.test", "key", positive_ttl, negative_ttl,
+        cache_size=100, rate=rate, max_connections=5, timeout=timeout,
+        transport=httpx.MockTransport(registry)
+    )
+
+ACTIVE = {"legal_name": "Acme Tools", "status": "Active"}
+
+@pytest.mark.asyncio
+async def test_registered_gstin_is_cached():
+    registry = Registry({GSTIN: ACTIVE})
+    verifier = make_verifier(registry)
+    first = await verifier.verify(GSTIN)
+    assert first == {"valid": True, "company_name": "Acme Tools", "status": "Active"}
+    assert await verifier.verify(GSTIN) == first
+    assert len(registry.calls) == 1
+    assert registry.calls[0].headers["X-API-Key"] == "key"
+    await verifier.stop()
+
+@pytest.mark.asyncio
+async def test_negative_results_expire_sooner():
+    registry = Registry({GSTIN: ACTIVE})
+    verifier = make_verifier(registry, positive_ttl=60, negative_ttl=0.05)
+    unknown = "29BBBBB5678D1Z2"
+    assert (await verifier.verify(unknown))["valid"] is False
+    await verifier.verify(GSTIN)
+    await asyncio.sleep(0.1)
+    assert (await verifier.verify(unknown))["valid"] is False
+    await verifier.verify(GSTIN)
+    paths = [call.url.path for call in registry.calls]
+    assert paths.count(f"/{unknown}") == 2
+    assert paths.count(f"/{GSTIN}") == 1
+    await verifier.stop()
+
+@pytest.mark.asyncio
+async def test_inactive_gstin_is_invalid():
+    registry = Registry({GSTIN: {"legal_name": "Acme Tools", "status": "Cancelled"}})
+    verifier = make_verifier(registry)
+    assert (await verifier.verify(GSTIN))["valid"] is False
+    await verifier.stop()
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_request():
+    registry = Registry({GSTIN: ACTIVE}, delay=0.05)
+    verifier = make_verifier(registry)
+    results = await asyncio.gather(*[verifier.verify(GSTIN) for _ in range(10)])
+    assert all(result["valid"] for result in results)
+    assert len(registry.calls) == 1
+    assert verifier.stats()["coalesced"] == 9
+    await verifier.stop()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("answer", [
+    429, 500, 503, httpx.ReadTimeout("timed out"), httpx.ConnectError("refused"),
+    httpx.Response(200, text="<html>Bad gateway</html>"),
+    {"legal_name": "Acme Tools"},
+    ["Active"],
+])
+async def test_registry_failures_raise_and_are_not_cached(answer):
+    registry = Registry({GSTIN: answer})
+    verifier = make_verifier(registry)
+    for _ in range(2):
+        with pytest.raises(RegistryUnavailable):
+            await verifier.verify(GSTIN)
+    assert len(registry.calls) == 2
+    assert verifier.stats()["registry_failures"] == 2
+
+    registry.responses[GSTIN] = ACTIVE
+    assert (await verifier.verify(GSTIN))["valid"] is True
+    await verifier.stop()
+
+@pytest.mark.asyncio
+async def test_lookups_that_would_wait_past_the_timeout_are_turned_away():
+    gstins = [f"27AAAPL{i:04d}C1Z5" for i in range(6)]
+    registry = Registry({gstin: ACTIVE for gstin in gstins})
+    # One call every 0.25s; a caller waits at most 0.5s for its turn
+    verifier = make_verifier(registry, rate=4, timeout=0.5)
+    results = await asyncio.gather(*[verifier.verify(gstin) for gstin in gstins], return_exceptions=True)
+    assert [isinstance(result, RegistryUnavailable) for result in results] == [False] * 3 + [True] * 3
+    assert len(registry.calls) == 3
+    assert verifier.stats()["rate_limited"] == 3
+    assert verifier.stats()["registry_failures"] == 0
+
+    # Turned away callers booked nothing, so the next one only waits out the interval
+    started = asyncio.get_running_loop().time()
+    assert (await verifier.verify(gstins[3]))["valid"] is True
+    assert asyncio.get_running_loop().time() - started < 0.3
+    await verifier.stop()
+
+@pytest.mark.asyncio
+async def test_malformed_gstin_skips_the_registry():
+    registry = Registry()
+    verifier = make_verifier(registry)
+    assert await verifier.verify("not-a-gstin") == {"valid": False, "message": "Invalid GST format"}
+    assert registry.calls == []
+    await verifier.stop()
@@ -0,0 +1,41 @@
+"""GET /api/images/{image_id} against the test database."""
+import uuid
+
+def test_missing_image_is_404(client):
+    assert client.get(f"/api/images/{uuid.uuid4()}?w=64").status_code == 404
+
+def test_renders_a_ready_image(client, new_product, upload_image, make_png):
+    image = upload_image(new_product, make_png((1, 2, 3)))
+    response = client.get(f"/api/images/{image['id']}?w=64&format=png")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+
+def test_image_that_failed_processing_is_422(client, new_product, upload_image):
+    image = upload_image(new_product, uuid.uuid4().bytes + b" is not an image")
+    assert image["status"] == "failed"
+    assert client.get(f"/api/images/{image['id']}?w=64").status_code == 422
+
+def test_image_still_processing_is_404(client, new_product, upload_image, make_png):
+    from app.database import SessionLocal
+    from app.models.product import ImageStatus, ProductImage
+    image = upload_image(new_product, make_png((4, 5, 6)))
+    with SessionLocal() as db:
+        db.get(ProductImage, uuid.UUID(image["id"])).status = ImageStatus.processing
+        db.commit()
+    assert client.get(f"/api/images/{image['id']}?w=64").status_code == 404
+
+def test_undecodable_original_is_422_and_not_rendered_again(client, new_product, upload_image, make_png):
+    from app.database import SessionLocal
+    from app.models.product import ProductImage
+    from app.services.image_derivatives import derivative_cache
+    # Unique bytes: the blob's original is overwritten below
+    image = upload_image(new_product, make_png(tuple(uuid.uuid4().bytes[:3])))
+    with SessionLocal() as db:
+        original_path = db.get(ProductImage, uuid.UUID(image["id"])).image_path
+    with open(original_path, "wb") as original:
+        original.write(b"truncated")
+
+    failed_renders = derivative_cache.stats()["failed_renders"]
+    for _ in range(3):
+        assert client.get(f"/api/images/{image['id']}?w=128").status_code == 422
+    assert derivative_cache.stats()["failed_renders"] == failed_renders + 1
@@ -0,0 +1,41 @@
+"""Range header parsing (app.utils.media.parse_range); no database."""
+import pytest
+from app.utils.media import RangeNotSatisfiable, parse_range
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=500-", (500, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=999-999", (999, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("Bytes = 10-19", (10, 19)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range(header, 1000) == expected
+
+@pytest.mark.parametrize("header", [
+    "items=0-99",
+    "bytes=0-99,200-299",
+    "bytes=",
+    "bytes=-",
+    "bytes=abc",
+    "bytes=a-b",
+    "bytes=10-5",
+    "bytes=1-x",
+    "bytes=--5",
+])
+def test_ignored_headers(header):
+    # Answered with the whole file
+    assert parse_range(header, 1000) is None
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=1000-2000", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=-10", 0),
+    ("bytes=0-", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
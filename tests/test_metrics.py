@@ -0,0 +1,87 @@
+"""MetricsMiddleware and the Prometheus rendering (app.utils.metrics), on a
+small app of its own; no database."""
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from app.utils import metrics as metrics_module
+from app.utils.metrics import MetricsMiddleware, MetricsRegistry, request_cost
+
+@pytest.fixture
+def registry(monkeypatch) -> MetricsRegistry:
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics_module, "metrics", registry)
+    return registry
+
+def make_app(server_timing: bool = True) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, server_timing=server_timing)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        # What instrument_engine's listeners do per statement
+        cost = request_cost.get()
+        cost.queries += 2
+        cost.db_seconds += 0.004
+        cost.rows += 3
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {"id": item_id}
+
+    @app.get("/crash")
+    async def crash():
+        raise RuntimeError("boom")
+
+    return app
+
+async def get(app: FastAPI, path: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path)
+
+@pytest.mark.asyncio
+async def test_server_timing_reports_database_cost(registry):
+    response = await get(make_app(), "/items/1")
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith('db;dur=4.0;desc="2 queries", app;dur=')
+
+@pytest.mark.asyncio
+async def test_server_timing_can_be_disabled(registry):
+    response = await get(make_app(server_timing=False), "/items/1")
+    assert "Server-Timing" not in response.headers
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template(registry):
+    app = make_app()
+    for path in ("/items/1", "/items/2", "/items/0", "/missing"):
+        await get(app, path)
+    route = (("route", "/items/{item_id}"),)
+    assert registry.requests.values[(("method", "GET"),) + route + (("status", "200"),)] == 2
+    assert registry.requests.values[(("method", "GET"),) + route + (("status", "404"),)] == 1
+    assert registry.requests.values[(("method", "GET"), ("route", "unmatched"), ("status", "404"))] == 1
+    assert registry.db_rows.values[route] == 9
+    assert registry.db_seconds.values[route] == pytest.approx(0.012)
+    assert registry.in_progress.values[(("method", "GET"),)] == 0
+
+@pytest.mark.asyncio
+async def test_unhandled_errors_count_as_500(registry):
+    response = await get(make_app(), "/crash")
+    assert response.status_code == 500
+    assert registry.requests.values[(("method", "GET"), ("route", "/crash"), ("status", "500"))] == 1
+    assert registry.in_progress.values[(("method", "GET"),)] == 0
+
+@pytest.mark.asyncio
+async def test_cost_is_not_attributed_outside_requests(registry):
+    await get(make_app(), "/items/1")
+    assert request_cost.get() is None
+
+@pytest.mark.asyncio
+async def test_render_prometheus_text(registry):
+    await get(make_app(), "/items/1")
+    text = registry.render()
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 1' in text
+    assert 'http_request_db_queries_bucket{route="/items/{item_id}",le="2"} 1' in text
+    assert 'http_request_db_queries_bucket{route="/items/{item_id}",le="1"} 0' in text
+    assert 'http_request_db_queries_count{route="/items/{item_id}"} 1' in text
+    assert text.endswith("\n")
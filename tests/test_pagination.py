@@ -0,0 +1,43 @@
+"""Keyset cursor encoding (app.utils.pagination); no database."""
+from datetime import datetime
+from decimal import Decimal
+from uuid import uuid4
+import pytest
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+@pytest.mark.parametrize("value", [
+    datetime(2024, 5, 17, 10, 30, 15, 123456),
+    Decimal("149999.50"),
+    42,
+    0.75,
+    "lathe machine",
+    None,
+])
+def test_round_trip(value):
+    row_id = uuid4()
+    cursor = encode_cursor("price", True, value, row_id)
+    assert decode_cursor(cursor, "price", True) == (value, row_id)
+
+def test_decimals_stay_exact():
+    cursor = encode_cursor("price", False, Decimal("0.10"), uuid4())
+    value, _ = decode_cursor(cursor, "price", False)
+    assert isinstance(value, Decimal) and str(value) == "0.10"
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor("title", False, "a/b+c?d=e&f", uuid4())
+    assert all(char.isalnum() or char in "-_" for char in cursor)
+
+@pytest.mark.parametrize("sort_key, descending", [("created_at", True), ("price", False)])
+def test_rejects_another_ordering(sort_key, descending):
+    cursor = encode_cursor("price", True, Decimal("10"), uuid4())
+    with pytest.raises(InvalidCursor, match="sort order"):
+        decode_cursor(cursor, sort_key, descending)
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "eyJzIjoicHJpY2UifQ", "bm90IGpzb24", "e30"])
+def test_rejects_malformed_cursors(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "price", True)
+
+def test_invalid_cursor_is_a_value_error():
+    # The listing turns ValueError into a 400
+    assert issubclass(InvalidCursor, ValueError)
@@ -0,0 +1,35 @@
+"""GET /api/products/export against the test database."""
+import asyncio
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+def test_exports_beyond_the_limit_are_turned_away(client, marketplace, monkeypatch):
+    from app.api import products as products_api
+    from app.services.product_export import export_slots, stream_products
+
+    finish = threading.Event()
+
+    async def held_stream(*args, **kwargs):
+        # Keeps the export (and its slot) open until the test lets it finish
+        while not finish.is_set():
+            await asyncio.sleep(0.01)
+        async for chunk in stream_products(*args, **kwargs):
+            yield chunk
+
+    monkeypatch.setattr(products_api, "stream_products", held_stream)
+    url = f"/api/products/export?category_id={marketplace['category_id']}"
+    headers = marketplace["buyer"]["headers"]
+    with ThreadPoolExecutor(export_slots.limit + 1) as pool:
+        futures = [pool.submit(client.get, url, headers=headers) for _ in range(export_slots.limit + 1)]
+        done, _ = wait(futures, timeout=30, return_when=FIRST_COMPLETED)
+        # Answered while the others still hold every slot
+        assert [future.result().status_code for future in done] == [503]
+        finish.set()
+        responses = [future.result() for future in futures]
+
+    assert sorted(response.status_code for response in responses) == [200] * export_slots.limit + [503]
+    rejected = next(response for response in responses if response.status_code == 503)
+    assert rejected.headers["Retry-After"] == "30"
+    exported = [response for response in responses if response.status_code == 200]
+    assert all(len(response.text.splitlines()) == len(marketplace["products"]) for response in exported)
+    assert export_slots.active == 0
@@ -0,0 +1,23 @@
+"""POST /api/products/{product_id}/images against the test database."""
+import os
+import uuid
+
+def test_failed_blob_is_retried_with_an_upload_under_another_extension(new_product, upload_image, make_png):
+    from app.database import SessionLocal
+    from app.models.product import ImageBlob, ImageStatus
+    content = make_png(tuple(uuid.uuid4().bytes[:3]))
+    image = upload_image(new_product, content, "photo.png")
+    with SessionLocal() as db:
+        blob = db.query(ImageBlob).filter(ImageBlob.original_path == image["image_path"]).one()
+        # As left by a render that failed and lost its original
+        blob.status = ImageStatus.failed
+        db.commit()
+        original_path = blob.original_path
+    os.remove(original_path)
+
+    retried = upload_image(new_product, content, "photo.jpeg", "image/jpeg")
+    assert retried["status"] == "ready"
+    assert retried["image_path"] == original_path
+    with open(original_path, "rb") as original:
+        assert original.read() == content
+    assert not os.path.exists(os.path.splitext(original_path)[0] + ".jpeg")
@@ -0,0 +1,85 @@
+"""Per-route SQL query budgets, measured with every cache cold.
+
+A lazy load inside a loop (one query per row) shows up here as a budget
+overrun with the offending statements listed, instead of in production.
+Budgets must not depend on page size.
+"""
+import pytest
+
+# Route name -> most statements one request may run. Authenticated routes
+# include the principal lookup.
+QUERY_BUDGETS = {
+    "list_products": 2,  # Page, plus suggestions when it comes back empty
+    "get_product_facets": 1,
+    "get_product": 1,
+    "get_my_products": 2,
+    "list_inbox": 2,
+    "get_conversation": 6,  # Includes marking the messages read
+    "send_message": 6,
+    "get_current_user_profile": 1,
+    "list_categories": 1,
+}
+
+@pytest.mark.parametrize("limit", [1, 5, 20])
+def test_list_products(budgeted_client, marketplace, limit):
+    response = budgeted_client.get(f"/api/products/?category_id={marketplace['category_id']}&limit={limit}")
+    assert response.status_code == 200
+    items = response.json()
+    assert len(items) == limit
+    assert all(item["primary_image"] for item in items)
+
+@pytest.mark.parametrize("query", ["sort_by=price&sort_order=asc", "query=lathe", "city=pune"])
+def test_list_products_filtered(budgeted_client, marketplace, query):
+    response = budgeted_client.get(f"/api/products/?category_id={marketplace['category_id']}&{query}")
+    assert response.status_code == 200
+
+def test_get_product_facets(budgeted_client, marketplace):
+    response = budgeted_client.get(
+        f"/api/products/facets?category_id={marketplace['category_id']}&facets=condition,category"
+    )
+    assert response.status_code == 200
+    assert response.json()["category"] == {marketplace["category_id"]: len(marketplace["products"])}
+
+def test_get_product(budgeted_client, marketplace):
+    response = budgeted_client.get(f"/api/products/{marketplace['products'][0]}")
+    assert response.status_code == 200
+    assert len(response.json()["images"]) == 2
+
+@pytest.mark.parametrize("limit", [1, 20])
+def test_get_my_products(budgeted_client, marketplace, limit):
+    response = budgeted_client.get(f"/api/products/my-products/?limit={limit}", headers=marketplace["seller"]["headers"])
+    assert response.status_code == 200
+    assert len(response.json()) == limit
+
+def test_list_inbox(budgeted_client, marketplace):
+    response = budgeted_client.get("/api/conversations/inbox", headers=marketplace["seller"]["headers"])
+    assert response.status_code == 200
+    assert response.json()
+
+def test_get_conversation(budgeted_client, marketplace):
+    response = budgeted_client.get(
+        f"/api/conversations/{marketplace['conversation_id']}", headers=marketplace["buyer"]["headers"]
+    )
+    assert response.status_code == 200
+    assert len(response.json()["messages"]) >= 5
+
+def test_send_message(budgeted_client, marketplace):
+    response = budgeted_client.post(
+        f"/api/conversations/{marketplace['conversation_id']}/messages",
+        headers=marketplace["buyer"]["headers"],
+        json={"message": "Is this still available?"}
+    )
+    assert response.status_code == 201
+
+def test_get_current_user(budgeted_client, marketplace):
+    response = budgeted_client.get("/api/users/me", headers=marketplace["buyer"]["headers"])
+    assert response.status_code == 200
+
+def test_list_categories(budgeted_client, marketplace):
+    assert budgeted_client.get("/api/categories/").status_code == 200
+
+def test_budget_overrun_reports_statements(budgeted_client, marketplace):
+    from conftest import QueryBudgetExceeded
+    budgeted_client.budgets = {**budgeted_client.budgets, "get_my_products": 0}
+    with pytest.raises(QueryBudgetExceeded, match="SELECT"):
+        budgeted_client.get("/api/products/my-products/", headers=marketplace["seller"]["headers"])